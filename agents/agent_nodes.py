@@ -1,18 +1,12 @@
 # agents/agent_nodes.py
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama.chat_models import ChatOllama
-from langchain_core.output_parsers import StrOutputParser
-from memory.chromadb_client import get_retriever
-from tools.web_search import get_web_search_tool
-import matplotlib.pyplot as plt
-import datetime
-import os
 import re
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_ollama.chat_models import ChatOllama
-# Initialize the local LLM
-llm = ChatOllama(model="llama3", temperature=0)
+from agents.llm_runtime import run_prompt
+from agents.research_sources import gather_research
+from agents.context_builder import NODE_TOKEN_BUDGETS, build_context, estimate_tokens, fit_fields, truncate_to_tokens
+from agents.model_registry import get_node_llm
+from tools.chart_renderer import chart_renderer
+# Each node gets its local LLM from the model registry (see agents/model_registry.py)
 
 def planner_node(state: dict):
     """
@@ -29,8 +23,7 @@ def planner_node(state: dict):
         """
     )
     
-    chain = prompt | llm | StrOutputParser()
-    plan = chain.invoke({"objective": objective})
+    plan = run_prompt(prompt, {"objective": objective}, get_node_llm("planner"))
     
     return {"plan": plan, "research_summary": ""}
 
@@ -40,24 +33,19 @@ def researcher_node(state: dict):
     """
     print("---RESEARCHING---")
     objective = state['objective']
-    plan = state['plan']
-    
-    # RAG retriever for memory search
-    retriever = get_retriever()
-    
-    # Web search tool
-    search_tool = get_web_search_tool()
+    plan = state.get('plan', '')
 
-    rag_docs = retriever.get_relevant_documents(objective)
-    web_results = search_tool.run(objective)
+    # Memory (RAG) and web search are queried at the same time, each with its own deadline.
+    # A workflow branch researching a single plan step passes that step as the query.
+    query = state.get('query') or objective
+    results, failures = gather_research(query)
 
-    context = f"""
-    Memory (Internal Knowledge):
-    {rag_docs}
-
-    Web Search Results (External Knowledge):
-    {web_results}
-    """
+    # Retrieved passages are deduplicated, ranked and packed into the node's token budget
+    budget = NODE_TOKEN_BUDGETS["researcher"]
+    plan = truncate_to_tokens(plan, budget // 4)
+    context = build_context(query, results, budget - estimate_tokens(plan))
+    for name, reason in failures.items():
+        context += f"\n[{name}] (unavailable: {reason})"
     
     prompt = ChatPromptTemplate.from_template(
         """You are a master researcher. Based on the provided internal knowledge and external web search results,
@@ -73,8 +61,7 @@ def researcher_node(state: dict):
         """
     )
     
-    chain = prompt | llm | StrOutputParser()
-    summary = chain.invoke({"objective": objective, "plan": plan, "context": context})
+    summary = run_prompt(prompt, {"objective": objective, "plan": plan, "context": context}, get_node_llm("researcher"))
 
     return {"research_summary": summary}
 
@@ -84,7 +71,7 @@ def coder_node(state: dict):
     """
     print("---CODING---")
     objective = state['objective']
-    research_summary = state['research_summary']
+    research_summary = truncate_to_tokens(state['research_summary'], NODE_TOKEN_BUDGETS["coder"])
     
     prompt = ChatPromptTemplate.from_template(
         """You are a world-class Python programmer. Based on the provided objective and research summary,
@@ -97,8 +84,7 @@ def coder_node(state: dict):
         """
     )
     
-    chain = prompt | llm | StrOutputParser()
-    code = chain.invoke({"objective": objective, "research_summary": research_summary})
+    code = run_prompt(prompt, {"objective": objective, "research_summary": research_summary}, get_node_llm("coder"))
 
     # For simplicity, we are not executing/debugging code here, but this is where
     # you would add a call to a code execution tool.
@@ -111,9 +97,16 @@ def writer_node(state: dict):
     """
     print("---WRITING REPORT---")
     objective = state['objective']
-    plan = state['plan']
-    research_summary = state['research_summary']
-    code = state['code']
+    # Steps skipped by the workflow router (or absent for a direct call) are left empty
+    plan = state.get('plan', '')
+    research_summary = state.get('research_summary', '')
+    code = state.get('code') or "No code was needed for this objective."
+    # Plan, research and code share the writer's token budget
+    fields = fit_fields(
+        {"plan": plan, "research_summary": research_summary, "code": code},
+        NODE_TOKEN_BUDGETS["writer"],
+    )
+    plan, research_summary, code = fields["plan"], fields["research_summary"], fields["code"]
     
     prompt = ChatPromptTemplate.from_template(
         """You are a professional technical writer. Your task is to generate a comprehensive Markdown report
@@ -143,20 +136,20 @@ def writer_node(state: dict):
         """
     )
     
-    chain = prompt | llm | StrOutputParser()
-    report = chain.invoke({
+    report = run_prompt(prompt, {
         "objective": objective,
         "plan": plan,
         "research_summary": research_summary,
         "code": code
-    })
+    }, get_node_llm("writer"))
     
     return {"report": report}
 def visualizer_node(state: dict):
     """
     Génère une visualisation (graphique) à partir de données structurées
-    et la sauvegarde en tant qu'image.
-    Retourne un lien Markdown vers l'image.
+    via le service de rendu (tools/chart_renderer.py).
+    Retourne un lien Markdown vers l'image ; en cas d'échec, le rapport contient
+    le message d'erreur et "error" est renseigné (l'exécution est alors dégradée).
     """
     print("--- VISUALIZING DATA ---")
     
@@ -171,30 +164,19 @@ def visualizer_node(state: dict):
         labels = [pair[0] for pair in data_pairs]
         values = [float(pair[1]) for pair in data_pairs]
     except Exception as e:
-        return {"report": f"Erreur : Impossible d'analyser les données pour le graphique. Données reçues : {data_string}. Erreur : {e}"}
+        return {"report": f"Erreur : Impossible d'analyser les données pour le graphique. Données reçues : {data_string}. Erreur : {e}",
+                "error": f"données invalides : {e}"}
 
-    # 2. Génération du graphique avec Matplotlib
-    fig, ax = plt.subplots()
-    ax.bar(labels, values, color=['#00aaff', '#00ffaa', '#ffaa00', '#ff5555'])
-    ax.set_ylabel('Population (en milliards)')
-    ax.set_title(objective)
-    plt.xticks(rotation=15, ha="right") # Améliore la lisibilité des labels
-
-    # 3. Sauvegarde du graphique dans le dossier /static
-    static_dir = "static"
-    if not os.path.exists(static_dir):
-        os.makedirs(static_dir)
-        
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    image_filename = f"chart_{timestamp}.png"
-    image_path = os.path.join(static_dir, image_filename)
-    
-    plt.savefig(image_path, bbox_inches='tight') # bbox_inches='tight' pour éviter que les labels soient coupés
-    plt.close(fig) # Libère la mémoire
-    print(f"Graphique sauvegardé : {image_path}")
+    # 2. Rendu du graphique hors du thread de la requête (process pool, cache par contenu)
+    try:
+        chart_url = chart_renderer.render(labels, values, title=objective, ylabel='Population (en milliards)')
+    except Exception as e:
+        return {"report": f"Erreur : Impossible de générer le graphique. Erreur : {e}",
+                "error": f"rendu du graphique : {type(e).__name__} {e}".strip()}
+    print(f"Graphique disponible : {chart_url}")
 
-    # 4. Retourne le lien Markdown vers l'image
-    markdown_link = f"![{objective}](/static/{image_filename})"
+    # 3. Retourne le lien Markdown vers l'image
+    markdown_link = f"![{objective}]({chart_url})"
     
     # La "sortie" de cet agent est un rapport contenant le lien
     return {"report": markdown_link}
@@ -231,10 +213,8 @@ def data_extractor_node(state: dict):
         """
     )
     
-    # On utilise un LLM avec une "température" de 0 pour qu'il soit le plus déterministe et factuel possible.
-    llm = ChatOllama(model="llama3", temperature=0)
-    chain = prompt | llm | StrOutputParser()
-    extracted_data_raw = chain.invoke({"text_to_parse": text_to_parse})
+    # Le client partagé du registre (température 0) : le plus déterministe et factuel possible.
+    extracted_data_raw = run_prompt(prompt, {"text_to_parse": text_to_parse}, get_node_llm("data_extractor"))
     
     print(f"Sortie brute de l'extracteur LLM : '{extracted_data_raw}'")
 
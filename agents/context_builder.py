@@ -0,0 +1,143 @@
+# agents/context_builder.py
+import os
+import re
+import math
+from collections import Counter
+
+# Prompt budgets in tokens for the context interpolated in each node's prompt
+NODE_TOKEN_BUDGETS = {
+    "researcher": int(os.getenv("CONTEXT_BUDGET_RESEARCHER", "1500")),
+    "coder": int(os.getenv("CONTEXT_BUDGET_CODER", "1500")),
+    "writer": int(os.getenv("CONTEXT_BUDGET_WRITER", "3000")),
+}
+# Passages sharing this fraction of their word 3-grams with a kept passage are dropped
+DUPLICATE_OVERLAP = float(os.getenv("CONTEXT_DUPLICATE_OVERLAP", "0.8"))
+PASSAGE_MAX_CHARS = 600
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count (about 4 characters per token for llama-family
+    tokenizers), good enough to budget prompts without loading a tokenizer.
+    """
+    return math.ceil(len(text) / 4) if text else 0
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cuts text at a word boundary so that it fits in `budget` tokens."""
+    if estimate_tokens(text) <= budget:
+        return text
+    cut = text[:max(0, budget * 4 - 16)]
+    cut = cut[:cut.rfind(" ")] if " " in cut else cut
+    return cut.rstrip() + " [...]"
+
+def _split_passages(text: str) -> list:
+    """Splits a long text (e.g. web results) into paragraph-sized passages."""
+    passages, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+|\n+", text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + len(sentence) > PASSAGE_MAX_CHARS:
+            passages.append(current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+    if current:
+        passages.append(current)
+    return passages
+
+def _passages_from(source: str, result) -> list:
+    """Turns a source result (documents, or text) into (source, text) passages, without metadata."""
+    if result is None:
+        return []
+    items = result if isinstance(result, (list, tuple)) else [result]
+    passages = []
+    for item in items:
+        text = getattr(item, "page_content", item)
+        if isinstance(text, str):
+            passages += [(source, passage) for passage in _split_passages(text)]
+    return passages
+
+def _shingles(text: str) -> set:
+    words = [word.lower() for word in _WORD.findall(text)]
+    if len(words) < 3:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+def _deduplicate(passages: list) -> list:
+    kept, kept_shingles = [], []
+    for source, text in passages:
+        shingles = _shingles(text)
+        if any(len(shingles & other) >= DUPLICATE_OVERLAP * len(shingles) for other in kept_shingles):
+            continue
+        kept.append((source, text))
+        kept_shingles.append(shingles)
+    return kept
+
+def _rank(query: str, passages: list) -> list:
+    """Orders passages by BM25-style relevance to the query (stable for equal scores)."""
+    query_terms = {word.lower() for word in _WORD.findall(query)}
+    documents = [Counter(word.lower() for word in _WORD.findall(text)) for _, text in passages]
+    if not documents:
+        return []
+    average_length = sum(sum(doc.values()) for doc in documents) / len(documents) or 1
+    frequency = Counter(term for doc in documents for term in query_terms if term in doc)
+
+    def score(doc: Counter) -> float:
+        length = sum(doc.values())
+        total = 0.0
+        for term in query_terms:
+            if term in doc:
+                idf = math.log(1 + (len(documents) - frequency[term] + 0.5) / (frequency[term] + 0.5))
+                tf = doc[term]
+                total += idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / average_length))
+        return total
+
+    order = sorted(range(len(passages)), key=lambda i: score(documents[i]), reverse=True)
+    return [passages[i] for i in order]
+
+def build_context(query: str, sources: dict, budget: int) -> str:
+    """
+    Assembles the context of a prompt from several sources ({name: documents or text}):
+    strips metadata, drops duplicate and overlapping passages, ranks them by
+    relevance to `query` and packs the best ones into `budget` tokens.
+    """
+    passages = []
+    for source, result in sources.items():
+        passages += _passages_from(source, result)
+    ranked = _rank(query, _deduplicate(passages))
+
+    packed, used = [], 0
+    for source, text in ranked:
+        line = f"[{source}] {text}"
+        tokens = estimate_tokens(line) + 1
+        if used + tokens > budget:
+            remaining = budget - used
+            # A partial passage is only worth it if a meaningful part of it fits
+            if remaining >= 64:
+                packed.append(truncate_to_tokens(line, remaining))
+            break
+        packed.append(line)
+        used += tokens
+    return "\n".join(packed)
+
+def fit_fields(fields: dict, budget: int) -> dict:
+    """
+    Shares a token budget between several prompt fields: fields smaller than
+    their fair share are kept whole, and the rest of the budget is split between
+    the larger ones, which are truncated.
+    """
+    sizes = {name: estimate_tokens(text or "") for name, text in fields.items()}
+    remaining, pending = budget, dict(sizes)
+    allowance = {}
+    while pending:
+        share = remaining // len(pending)
+        small = {name: size for name, size in pending.items() if size <= share}
+        if not small:
+            allowance.update({name: share for name in pending})
+            break
+        for name, size in small.items():
+            allowance[name] = size
+            remaining -= size
+            del pending[name]
+    return {name: truncate_to_tokens(text or "", allowance[name]) for name, text in fields.items()}
@@ -0,0 +1,158 @@
+# agents/llm_runtime.py
+import os
+import json
+import time
+import hashlib
+import threading
+import contextvars
+from contextlib import contextmanager
+from langchain_core.output_parsers import StrOutputParser
+from memory.cache_store import TieredCache, cache_path
+from agents.context_builder import estimate_tokens
+from agents.model_registry import model_registry
+from tools.tracing import span, record_cache_lookup, record_llm_tokens
+
+# Maximum number of generations sent to the local Ollama server at the same time.
+# Extra callers wait here instead of piling up inside Ollama.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+# Response cache. Nodes run at temperature 0, so the same rendered prompt sent to
+# the same model yields the same completion: re-running an objective is free.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+
+llm_cache = TieredCache(
+    cache_path("llm_cache.sqlite3"),
+    "llm_responses",
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+    memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+    ttl_seconds=LLM_CACHE_TTL,
+)
+
+_cache_bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+# Callback receiving (event, data) for the current request, when it is streamed.
+_event_sink = contextvars.ContextVar("event_sink", default=None)
+_current_node = contextvars.ContextVar("current_node", default=None)
+# Token usage accumulated by the current request (shared with its worker threads)
+_usage = contextvars.ContextVar("llm_usage", default=None)
+_usage_lock = threading.Lock()
+
+@contextmanager
+def stream_events(callback):
+    """Routes node and token events produced in this context to `callback(event, data)`."""
+    token = _event_sink.set(callback)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+@contextmanager
+def bypass_llm_cache(bypass: bool = True):
+    """Within this context, LLM calls neither read nor write the response cache."""
+    token = _cache_bypass.set(bypass)
+    try:
+        yield
+    finally:
+        _cache_bypass.reset(token)
+
+@contextmanager
+def track_usage():
+    """Collects the LLM calls and (estimated) token counts made within this context."""
+    usage = {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+def _record_usage(prompt_tokens: int, completion_tokens: int, cached: bool):
+    usage = _usage.get()
+    if usage is None:
+        return
+    with _usage_lock:
+        usage["calls"] += 1
+        usage["cached_calls"] += int(cached)
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+
+def llm_cache_key(rendered_prompt: str, llm) -> str:
+    """Hash of the rendered prompt and the generation parameters of `llm`."""
+    payload = json.dumps({
+        "prompt": rendered_prompt,
+        "model": getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def emit_event(event: str, **data):
+    """Sends an event to the active sink, if any. A no-op for non-streamed requests."""
+    sink = _event_sink.get()
+    if sink is not None:
+        sink(event, data)
+
+def run_node(name: str, node_func, state: dict) -> dict:
+    """Calls a node function, surrounding it with node_start / node_end events."""
+    emit_event("node_start", node=name)
+    token = _current_node.set(name)
+    try:
+        with span("node", name):
+            result = node_func(state)
+    finally:
+        _current_node.reset(token)
+    emit_event("node_end", node=name)
+    return result
+
+def run_prompt(prompt, inputs: dict, llm) -> str:
+    """
+    Runs `prompt | llm | StrOutputParser()` while holding one of the LLM slots.
+    Completions are served from / stored in the response cache unless it is
+    bypassed. When an event sink is active the completion is streamed and each
+    chunk is emitted as a `token` event as soon as the model produces it.
+    This is blocking: call it from a worker thread, never from the event loop.
+    """
+    rendered = prompt.format(**inputs)
+    prompt_tokens = estimate_tokens(rendered)
+    node = _current_node.get()
+    model = getattr(llm, "model", None)
+    print(f"---PROMPT ({node or model or 'llm'}): ~{prompt_tokens} tokens---")
+    emit_event("prompt", node=node, prompt_tokens=prompt_tokens)
+
+    with span("llm", model or "llm", node=node, prompt_tokens=prompt_tokens) as record:
+        use_cache = LLM_CACHE_ENABLED and not _cache_bypass.get()
+        if use_cache:
+            key = llm_cache_key(rendered, llm)
+            cached = llm_cache.get(key)
+            record_cache_lookup("llm", cached is not None)
+            if cached is not None:
+                record.update(cache_hit=True, completion_tokens=estimate_tokens(cached))
+                _record_usage(prompt_tokens, record["completion_tokens"], cached=True)
+                emit_event("token", node=node, text=cached, cached=True)
+                return cached
+        record["cache_hit"] = False
+
+        chain = prompt | llm | StrOutputParser()
+        queued = time.perf_counter()
+        with _llm_slots:
+            start = time.perf_counter()
+            record["queued_ms"] = round((start - queued) * 1000, 1)
+            if _event_sink.get() is None:
+                result = chain.invoke(inputs)
+            else:
+                chunks = []
+                for chunk in chain.stream(inputs):
+                    chunks.append(chunk)
+                    emit_event("token", node=node, text=chunk)
+                result = "".join(chunks)
+            model_registry.record_latency(node, model, time.perf_counter() - start)
+        record["completion_tokens"] = estimate_tokens(result)
+        _record_usage(prompt_tokens, record["completion_tokens"], cached=False)
+        record_llm_tokens(model, node, prompt_tokens, record["completion_tokens"])
+
+    if use_cache:
+        llm_cache.set(key, result)
+    return result
@@ -0,0 +1,148 @@
+# agents/model_registry.py
+import os
+import time
+import threading
+
+DEFAULT_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "")
+# How long Ollama keeps a model in memory after a request ("30m", "-1" = forever)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Load the configured models into Ollama when the API starts
+OLLAMA_WARM_ON_STARTUP = os.getenv("OLLAMA_WARM_ON_STARTUP", "1") == "1"
+# Seconds between two keep-warm pings of every configured model (0 = no periodic ping)
+OLLAMA_WARM_INTERVAL = float(os.getenv("OLLAMA_WARM_INTERVAL", "0"))
+# Seconds spent on the fallback model before the primary model is tried again
+MODEL_FALLBACK_COOLDOWN = float(os.getenv("MODEL_FALLBACK_COOLDOWN", "300"))
+
+NODES = ("planner", "researcher", "coder", "writer", "data_extractor")
+
+def _node_setting(prefix: str, node: str, default: str = "") -> str:
+    """Reads e.g. MODEL_FALLBACK_PLANNER, then MODEL_FALLBACK (the value for every node), then `default`."""
+    return os.getenv(f"{prefix}_{node.upper()}", os.getenv(prefix, default))
+
+class ModelRegistry:
+    """
+    Per-node model configuration with shared, reused Ollama clients.
+
+    Each node has a primary model (MODEL_<NODE>, default OLLAMA_MODEL), an optional
+    fallback (MODEL_FALLBACK_<NODE>) and an optional latency target in seconds
+    (MODEL_LATENCY_TARGET_<NODE>). When the moving average latency of the node's own
+    calls to its primary model exceeds the target, the node uses its fallback for
+    MODEL_FALLBACK_COOLDOWN seconds before trying the primary model again.
+    """
+
+    def __init__(self):
+        self.node_models = {node: os.getenv(f"MODEL_{node.upper()}", DEFAULT_MODEL) for node in NODES}
+        self.fallbacks = {node: _node_setting("MODEL_FALLBACK", node) for node in NODES}
+        self.latency_targets = {node: float(_node_setting("MODEL_LATENCY_TARGET", node, "0")) for node in NODES}
+        self._clients = {}
+        self._latency = {}
+        self._degraded_until = {}
+        self._lock = threading.Lock()
+        self._warm_thread = None
+
+    def register_node(self, node: str, model: str, fallback: str = "", latency_target: float = 0.0):
+        """Configures (or reconfigures) the models of a node."""
+        self.node_models[node] = model
+        self.fallbacks[node] = fallback
+        self.latency_targets[node] = latency_target
+
+    def client(self, model: str):
+        """Returns the shared ChatOllama client of a model, created on first use."""
+        with self._lock:
+            if model not in self._clients:
+                from langchain_ollama.chat_models import ChatOllama
+                kwargs = {"model": model, "temperature": 0, "keep_alive": OLLAMA_KEEP_ALIVE}
+                if OLLAMA_BASE_URL:
+                    kwargs["base_url"] = OLLAMA_BASE_URL
+                self._clients[model] = ChatOllama(**kwargs)
+            return self._clients[model]
+
+    def set_client(self, model: str, client):
+        """Uses a ready-made chat model for `model` instead of a ChatOllama client (offline benchmarks)."""
+        with self._lock:
+            self._clients[model] = client
+
+    def model_for(self, node: str) -> str:
+        """Name of the model the node should use right now (primary, or fallback while degraded)."""
+        primary = self.node_models.get(node, DEFAULT_MODEL)
+        fallback = self.fallbacks.get(node)
+        target = self.latency_targets.get(node, 0.0)
+        if not fallback or not target:
+            return primary
+
+        now = time.time()
+        with self._lock:
+            if self._degraded_until.get(node, 0) > now:
+                return fallback
+            if self._degraded_until.pop(node, None) is not None:
+                # Cooldown over: forget the old measurements and give the primary model another chance
+                self._latency.pop((node, primary), None)
+                return primary
+            if self._latency.get((node, primary), 0.0) > target:
+                self._degraded_until[node] = now + MODEL_FALLBACK_COOLDOWN
+                print(f"Model '{primary}' misses the {target:g}s target of '{node}', using '{fallback}'.")
+                return fallback
+        return primary
+
+    def for_node(self, node: str):
+        return self.client(self.model_for(node))
+
+    def record_latency(self, node: str, model: str, seconds: float, weight: float = 0.3):
+        """
+        Feeds the moving average latency of a model for one node (uncached generations
+        only). Averages are kept per node: nodes sharing a model produce outputs of very
+        different lengths, and a slow writer must not push a fast planner onto its fallback.
+        """
+        with self._lock:
+            previous = self._latency.get((node, model))
+            self._latency[(node, model)] = seconds if previous is None else (1 - weight) * previous + weight * seconds
+
+    def configured_models(self) -> list:
+        models = set(self.node_models.values()) | {model for model in self.fallbacks.values() if model}
+        return sorted(models)
+
+    def warm_up(self, models: list = None) -> list:
+        """
+        Loads models into Ollama's memory ahead of the first request, by sending
+        an empty prompt, and refreshes their keep-alive. Returns the models that failed.
+        """
+        import ollama
+        ollama_client = ollama.Client(host=OLLAMA_BASE_URL or None)
+        failed = []
+        for model in models or self.configured_models():
+            start = time.perf_counter()
+            try:
+                ollama_client.generate(model=model, prompt="", keep_alive=OLLAMA_KEEP_ALIVE)
+                print(f"Model '{model}' warm ({time.perf_counter() - start:.1f}s).")
+            except Exception as e:
+                print(f"Could not warm up model '{model}': {e}")
+                failed.append(model)
+        return failed
+
+    def start_keep_warm(self, interval: float = OLLAMA_WARM_INTERVAL):
+        """Pings every configured model every `interval` seconds in a background thread."""
+        if interval <= 0 or self._warm_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.warm_up()
+
+        self._warm_thread = threading.Thread(target=loop, name="ollama-keep-warm", daemon=True)
+        self._warm_thread.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            latency = {}
+            for (node, model), seconds in self._latency.items():
+                latency.setdefault(node or "", {})[model] = round(seconds, 2)
+            degraded = [node for node, until in self._degraded_until.items() if until > time.time()]
+        return {"nodes": dict(self.node_models), "fallbacks": dict(self.fallbacks), "latency_seconds": latency, "degraded_nodes": degraded}
+
+model_registry = ModelRegistry()
+
+def get_node_llm(node: str):
+    """The shared chat model a node should use for its next call."""
+    return model_registry.for_node(node)
@@ -0,0 +1,79 @@
+# agents/research_sources.py
+import os
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from memory.chromadb_client import retrieve
+from tools.web_search import get_web_search_tool
+
+# Deadline of each source, counted from when it starts running; a slower source is
+# reported as missing instead of blocking the step
+RESEARCH_SOURCE_TIMEOUT = float(os.getenv("RESEARCH_SOURCE_TIMEOUT", "20"))
+RESEARCH_MEMORY_K = int(os.getenv("RESEARCH_MEMORY_K", "5"))
+RESEARCH_WORKERS = int(os.getenv("RESEARCH_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=RESEARCH_WORKERS, thread_name_prefix="research")
+
+# name -> (fetch(query), timeout in seconds or None for the default)
+_sources = OrderedDict()
+
+def register_research_source(name: str, fetch, timeout: float = None):
+    """Adds a source queried by the researcher. `fetch(query)` must return text or documents."""
+    _sources[name] = (fetch, timeout)
+
+def search_memory(query: str):
+    return retrieve(query, RESEARCH_MEMORY_K)
+
+def search_web(query: str):
+    return get_web_search_tool().run(query)
+
+register_research_source("memory", search_memory)
+register_research_source("web", search_web)
+
+class _SourceCall:
+    """Runs fetch(query) on the shared pool and records when it actually started."""
+
+    def __init__(self, fetch, query: str):
+        self.started = threading.Event()
+        self.started_at = None
+        context = contextvars.copy_context()
+        self.future = _executor.submit(context.run, self._run, fetch, query)
+
+    def _run(self, fetch, query: str):
+        self.started_at = time.monotonic()
+        self.started.set()
+        return fetch(query)
+
+def gather_research(query: str) -> tuple:
+    """
+    Queries every registered source in parallel.
+    Returns (results, failures): {source: result} for the sources that answered
+    in time, and {source: reason} for the ones that timed out, raised, or were
+    still waiting for a thread of the shared pool when their deadline expired.
+    """
+    submitted = time.monotonic()
+    calls = OrderedDict()
+    for name, (fetch, timeout) in _sources.items():
+        calls[name] = (_SourceCall(fetch, query), timeout or RESEARCH_SOURCE_TIMEOUT)
+
+    results, failures = OrderedDict(), OrderedDict()
+    for name, (call, timeout) in calls.items():
+        # Time spent queued behind other requests does not count against the source
+        if not call.started.wait(max(0.0, submitted + timeout - time.monotonic())):
+            if call.future.cancel():
+                failures[name] = f"skipped, all {RESEARCH_WORKERS} research threads busy for {timeout:g}s"
+                continue
+            call.started.wait()  # picked up by a thread just now
+        remaining = max(0.0, call.started_at + timeout - time.monotonic())
+        try:
+            results[name] = call.future.result(timeout=remaining)
+        except TimeoutError:
+            # A running fetch cannot be interrupted: its thread stays busy until it returns
+            failures[name] = f"timed out after {timeout:g}s"
+        except Exception as e:
+            failures[name] = str(e)
+    for name, reason in failures.items():
+        print(f"Research source '{name}' unavailable: {reason}")
+    return results, failures
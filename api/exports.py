@@ -0,0 +1,175 @@
+# api/exports.py
+import os
+import re
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from memory.cache_store import cache_path, evict_least_recent
+from tools.tracing import span, record_cache_lookup
+
+# Dossier des rapports Markdown (source de toutes les exportations)
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")
+# Exportations générées à la demande, conservées sur disque jusqu'à éviction
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", cache_path("exports"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_TIMEOUT = float(os.getenv("EXPORT_TIMEOUT", "60"))
+
+REPORT_ID_PATTERN = re.compile(r"[\w\- ]+")
+
+
+def render_pdf(markdown: str, target: str):
+    """Rendu PDF (FPDF, police latin-1). Un appel à multi_cell par ligne : linéaire sur les longs rapports."""
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    encoded_content = markdown.encode('latin-1', 'replace').decode('latin-1')
+    for line in encoded_content.splitlines():
+        if line.strip():
+            pdf.multi_cell(0, 10, line)
+        else:
+            pdf.ln(10)
+    pdf.output(target)
+
+
+def render_markdown(markdown: str, target: str):
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(markdown)
+
+
+# format -> (extension, type MIME, fonction de rendu exécutée dans un processus du pool)
+EXPORT_FORMATS = {
+    "pdf": ("pdf", "application/pdf", render_pdf),
+    "md": ("md", "text/markdown; charset=utf-8", render_markdown),
+}
+
+
+def register_export_format(name: str, extension: str, media_type: str, render):
+    """Ajoute un format. `render(markdown, target)` doit être une fonction de module (picklable)."""
+    EXPORT_FORMATS[name] = (extension, media_type, render)
+
+
+def _render_export(render, source: str, target: str):
+    """Exécuté dans un processus du pool : écrit l'exportation de façon atomique."""
+    with open(source, encoding="utf-8") as f:
+        markdown = f.read()
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    render(markdown, tmp_path)
+    os.replace(tmp_path, target)
+
+
+class ExportService:
+    """
+    Exportations des rapports de /history (PDF, Markdown...) générées à la demande,
+    dans un pool de processus. Le résultat est mis en cache sur disque et régénéré
+    seulement si le rapport a changé ; les exportations les moins récemment servies
+    sont supprimées au-delà de max_bytes.
+    """
+
+    def __init__(self, history_dir: str = HISTORY_DIR, directory: str = EXPORT_CACHE_DIR,
+                 workers: int = EXPORT_WORKERS, max_bytes: int = EXPORT_CACHE_MAX_BYTES,
+                 timeout: float = EXPORT_TIMEOUT):
+        self.history_dir = history_dir
+        self.directory = directory
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._pool = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def source_path(self, report_id: str) -> str:
+        """Chemin du rapport Markdown. Lève KeyError si l'identifiant est invalide ou inconnu."""
+        if not REPORT_ID_PATTERN.fullmatch(report_id):
+            raise KeyError(f"Identifiant de rapport invalide : '{report_id}'.")
+        path = os.path.join(self.history_dir, f"{report_id}.md")
+        if not os.path.exists(path):
+            raise KeyError(f"Rapport '{report_id}' introuvable.")
+        return path
+
+    def _submit(self, report_id: str, fmt: str):
+        """Retourne (chemin, future) ; future est None si l'exportation en cache est à jour."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Format '{fmt}' non supporté ({', '.join(EXPORT_FORMATS)}).")
+        source = self.source_path(report_id)
+        target = os.path.join(self.directory, f"{report_id}.{EXPORT_FORMATS[fmt][0]}")
+        with self._lock:
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+                self.hits += 1
+                os.utime(target)
+                return target, None
+            future = self._inflight.get(target)
+            if future is None:
+                os.makedirs(self.directory, exist_ok=True)
+                future = self._executor().submit(_render_export, EXPORT_FORMATS[fmt][2], source, target)
+                future.add_done_callback(lambda _: self._finished(target))
+                self._inflight[target] = future
+                self.renders += 1
+            return target, future
+
+    def _finished(self, target: str):
+        with self._lock:
+            self._inflight.pop(target, None)
+
+    def export(self, report_id: str, fmt: str = "pdf") -> str:
+        """Chemin de l'exportation, générée si besoin. Bloquant : à appeler hors de la boucle d'événements."""
+        target, future = self._submit(report_id, fmt)
+        record_cache_lookup("exports", future is None)
+        if future is not None:
+            with span("render", f"export_{fmt}"):
+                future.result(timeout=self.timeout)
+            self.collect_garbage()
+        return target
+
+    def export_many(self, report_ids: list, fmt: str = "pdf") -> dict:
+        """
+        Exporte plusieurs rapports en parallèle dans le pool.
+        Retourne {report_id: {"path": ...} ou {"error": ...}}.
+        """
+        results, pending = {}, {}
+        for report_id in report_ids:
+            try:
+                target, future = self._submit(report_id, fmt)
+            except (KeyError, ValueError) as e:
+                results[report_id] = {"error": e.args[0]}
+                continue
+            if future is None:
+                results[report_id] = {"path": target}
+            else:
+                pending[report_id] = (target, future)
+        with span("render", f"export_{fmt}_batch", reports=len(pending)):
+            wait([future for _, future in pending.values()], timeout=self.timeout)
+        for report_id, (target, future) in pending.items():
+            try:
+                future.result(timeout=0)
+                results[report_id] = {"path": target}
+            except Exception as e:
+                results[report_id] = {"error": str(e) or type(e).__name__}
+        if pending:
+            self.collect_garbage()
+        return results
+
+    def collect_garbage(self) -> int:
+        deleted = evict_least_recent(self.directory, self.max_bytes)
+        with self._lock:
+            self.evictions += deleted
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "renders": self.renders, "in_flight": len(self._inflight),
+                    "evictions": self.evictions, "max_bytes": self.max_bytes}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
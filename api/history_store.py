@@ -0,0 +1,220 @@
+# api/history_store.py
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import datetime
+import threading
+
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "./history/history.sqlite3")
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+HISTORY_MAX_PAGE_SIZE = 200
+
+# Nom des fichiers écrits dans /history : {timestamp}_{agent}_{objectif}_{suffixe}.md
+# (les rapports antérieurs n'ont pas de suffixe, tiré du run_id)
+KNOWN_AGENTS = ("analyst_visualizer", "workflow", "planner", "researcher", "coder", "writer")
+REPORT_SUFFIX_LENGTH = 8
+REPORT_FILENAME = re.compile(r"(\d{8}_\d{6})_(%s|[^_]+)_(.*?)(?:_[0-9a-f]{%d})?"
+                             % ("|".join(KNOWN_AGENTS), REPORT_SUFFIX_LENGTH))
+
+COLUMNS = (
+    "run_id", "agent", "objective", "status", "error", "started_at", "finished_at", "duration_seconds",
+    "llm_calls", "cached_llm_calls", "prompt_tokens", "completion_tokens", "semantic_cache_hit",
+    "report_id", "artifacts", "preview", "source",
+)
+
+# Chaque migration fait passer PRAGMA user_version de i à i + 1
+MIGRATIONS = (
+    """
+    CREATE TABLE runs (
+        run_id TEXT PRIMARY KEY, agent TEXT NOT NULL, objective TEXT NOT NULL,
+        status TEXT NOT NULL, error TEXT, started_at REAL NOT NULL, finished_at REAL,
+        duration_seconds REAL, llm_calls INTEGER, cached_llm_calls INTEGER,
+        prompt_tokens INTEGER, completion_tokens INTEGER, semantic_cache_hit INTEGER NOT NULL DEFAULT 0,
+        report_id TEXT UNIQUE, artifacts TEXT NOT NULL DEFAULT '{}', preview TEXT NOT NULL DEFAULT '',
+        source TEXT NOT NULL DEFAULT 'live'
+    );
+    CREATE INDEX runs_started_at ON runs (started_at DESC);
+    CREATE INDEX runs_agent_started_at ON runs (agent, started_at DESC);
+    CREATE VIRTUAL TABLE runs_fts USING fts5(objective, report, content='');
+    """,
+    # Le run_id est la seule clé : deux exécutions peuvent partager un report_id (index non unique).
+    # Les rowid sont conservés, car ils relient chaque exécution à son entrée de runs_fts.
+    """
+    CREATE TABLE runs_v2 (
+        run_id TEXT PRIMARY KEY, agent TEXT NOT NULL, objective TEXT NOT NULL,
+        status TEXT NOT NULL, error TEXT, started_at REAL NOT NULL, finished_at REAL,
+        duration_seconds REAL, llm_calls INTEGER, cached_llm_calls INTEGER,
+        prompt_tokens INTEGER, completion_tokens INTEGER, semantic_cache_hit INTEGER NOT NULL DEFAULT 0,
+        report_id TEXT, artifacts TEXT NOT NULL DEFAULT '{}', preview TEXT NOT NULL DEFAULT '',
+        source TEXT NOT NULL DEFAULT 'live'
+    );
+    INSERT INTO runs_v2 (rowid, %(columns)s) SELECT rowid, %(columns)s FROM runs;
+    DROP TABLE runs;
+    ALTER TABLE runs_v2 RENAME TO runs;
+    CREATE INDEX runs_started_at ON runs (started_at DESC);
+    CREATE INDEX runs_agent_started_at ON runs (agent, started_at DESC);
+    CREATE INDEX runs_report_id ON runs (report_id);
+    """ % {"columns": ", ".join(COLUMNS)},
+)
+
+
+def fts_query(text: str) -> str:
+    """Transforme une saisie libre en requête FTS5 : tous les mots doivent apparaître."""
+    return " ".join(f'"{term}"' for term in re.findall(r"\w+", text))
+
+
+class HistoryStore:
+    """
+    Index SQLite des exécutions d'agents : identifiant, agent, objectif, durées,
+    tokens consommés et chemins des fichiers produits, avec une recherche plein
+    texte (FTS5) sur l'objectif et le rapport. Les listes sont paginées.
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for i, script in enumerate(MIGRATIONS[version:], start=version):
+                conn.executescript(f"BEGIN; {script} PRAGMA user_version = {i + 1}; COMMIT;")
+            self._conn = conn
+        return self._conn
+
+    def record(self, run: dict, report: str = "") -> bool:
+        """
+        Enregistre une exécution (clés de COLUMNS ; artifacts est un dict).
+        Retourne False, en le signalant, si ce run_id était déjà enregistré.
+        """
+        row = {column: run.get(column) for column in COLUMNS}
+        row["artifacts"] = json.dumps(run.get("artifacts") or {}, ensure_ascii=False)
+        row["preview"] = (report or "")[:280]
+        row["semantic_cache_hit"] = int(bool(run.get("semantic_cache_hit")))
+        row["source"] = run.get("source") or "live"
+        with self._lock:
+            db = self._db()
+            cursor = db.execute(
+                f"INSERT OR IGNORE INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+                [row[column] for column in COLUMNS],
+            )
+            if cursor.rowcount:
+                db.execute("INSERT INTO runs_fts (rowid, objective, report) VALUES (?, ?, ?)",
+                           (cursor.lastrowid, row["objective"], report or ""))
+            db.commit()
+        if not cursor.rowcount:
+            print(f"Historique : l'exécution {row['run_id']} est déjà enregistrée, nouvelle entrée ignorée.")
+        return bool(cursor.rowcount)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        run = dict(row)
+        run["artifacts"] = json.loads(run["artifacts"])
+        run["semantic_cache_hit"] = bool(run["semantic_cache_hit"])
+        return run
+
+    @staticmethod
+    def _page(limit: int, offset: int) -> tuple:
+        return max(1, min(limit or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE)), max(0, offset)
+
+    def get(self, run_id: str) -> dict:
+        with self._lock:
+            row = self._db().execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Exécution '{run_id}' introuvable.")
+        return self._to_dict(row)
+
+    def list(self, limit: int = HISTORY_PAGE_SIZE, offset: int = 0, agent: str = None) -> dict:
+        """Exécutions les plus récentes d'abord."""
+        limit, offset = self._page(limit, offset)
+        where, params = ("WHERE agent = ?", [agent]) if agent else ("", [])
+        with self._lock:
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT * FROM runs {where} ORDER BY started_at DESC LIMIT ? OFFSET ?", params + [limit, offset]
+            ).fetchall()
+        return {"total": total, "limit": limit, "offset": offset, "items": [self._to_dict(row) for row in rows]}
+
+    def search(self, query: str, limit: int = HISTORY_PAGE_SIZE, offset: int = 0, agent: str = None) -> dict:
+        """Recherche plein texte dans les objectifs et les rapports, les plus pertinents d'abord."""
+        limit, offset = self._page(limit, offset)
+        match = fts_query(query)
+        if not match:
+            return {"total": 0, "limit": limit, "offset": offset, "items": []}
+        where, params = "runs_fts MATCH ?", [match]
+        if agent:
+            where, params = where + " AND runs.agent = ?", params + [agent]
+        join = "FROM runs_fts JOIN runs ON runs.rowid = runs_fts.rowid"
+        with self._lock:
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) {join} WHERE {where}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT runs.* {join} WHERE {where} ORDER BY bm25(runs_fts), runs.started_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return {"total": total, "limit": limit, "offset": offset, "items": [self._to_dict(row) for row in rows]}
+
+    def import_directory(self, history_dir: str) -> int:
+        """
+        Migration : indexe les rapports déjà présents dans history_dir (.md, et .pdf
+        à côté). Les rapports déjà indexés ne sont pas relus : relancer l'import
+        ne coûte qu'un listage du dossier.
+        """
+        imported = 0
+        try:
+            filenames = sorted(name for name in os.listdir(history_dir) if name.endswith(".md"))
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            known = {row[0] for row in self._db().execute("SELECT report_id FROM runs WHERE report_id IS NOT NULL")}
+        for filename in filenames:
+            report_id = filename[:-3]
+            match = REPORT_FILENAME.fullmatch(report_id)
+            if report_id in known or not match:
+                continue
+            timestamp, agent, objective = match.groups()
+            path = os.path.join(history_dir, filename)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                report = f.read()
+            artifacts = {"markdown": path}
+            pdf_path = os.path.join(history_dir, f"{report_id}.pdf")
+            if os.path.exists(pdf_path):
+                artifacts["pdf"] = pdf_path
+            started_at = datetime.datetime.strptime(timestamp, "%Y%m%d_%H%M%S").timestamp()
+            imported += self.record({
+                "run_id": report_id, "agent": agent, "objective": objective, "status": "succeeded",
+                "started_at": started_at, "report_id": report_id, "artifacts": artifacts, "source": "imported",
+            }, report)
+        return imported
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db()
+            by_agent = dict(db.execute("SELECT agent, COUNT(*) FROM runs GROUP BY agent").fetchall())
+            totals = db.execute(
+                "SELECT COUNT(*), AVG(duration_seconds), SUM(prompt_tokens), SUM(completion_tokens) FROM runs"
+            ).fetchone()
+        return {
+            "runs": totals[0],
+            "runs_by_agent": by_agent,
+            "avg_duration_seconds": round(totals[1], 2) if totals[1] is not None else None,
+            "prompt_tokens": totals[2] or 0,
+            "completion_tokens": totals[3] or 0,
+        }
+
+
+if __name__ == "__main__":
+    # Import manuel : python -m api.history_store [dossier_history]
+    start = time.perf_counter()
+    count = HistoryStore().import_directory(sys.argv[1] if len(sys.argv) > 1 else "history")
+    print(f"{count} rapports importés en {time.perf_counter() - start:.1f}s.")
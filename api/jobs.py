@@ -0,0 +1,117 @@
+# api/jobs.py
+import os
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Nombre de workers qui exécutent les agents (appels bloquants à Ollama)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Nombre maximal de jobs en attente au-delà des workers occupés
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+# Nombre de jobs terminés conservés en mémoire pour la consultation
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "200"))
+
+
+class JobQueueFull(Exception):
+    """Levée quand la file d'attente des jobs a atteint sa capacité maximale."""
+
+
+class Job:
+    """Un travail soumis à l'exécuteur, avec son statut et son résultat."""
+
+    def __init__(self, description: str = ""):
+        self.id = uuid.uuid4().hex
+        self.description = description
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.future = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "description": self.description,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Exécute les fonctions bloquantes des agents dans un pool de threads borné,
+    pour que la boucle d'événements d'uvicorn ne soit jamais bloquée.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_SIZE, retention: int = JOB_RETENTION):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, description: str = "", **kwargs) -> Job:
+        """Ajoute un job à la file. Lève JobQueueFull si la file est pleine."""
+        with self._lock:
+            unfinished = sum(1 for job in self._jobs.values() if not job.done)
+            if unfinished >= self.max_workers + self.max_pending:
+                raise JobQueueFull(f"File d'attente pleine ({unfinished} jobs en cours ou en attente).")
+            job = Job(description)
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = "succeeded"
+            return job.result
+        except Exception as e:
+            job.error = str(getattr(e, "detail", e))
+            job.status = "failed"
+            raise
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        # On ne supprime que des jobs terminés, du plus ancien au plus récent
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.retention)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job: Job):
+        """Attend le résultat d'un job sans bloquer la boucle d'événements."""
+        return await asyncio.wrap_future(job.future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,80 @@
+# api/lifecycle.py
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# Délai avant de réessayer une étape en échec, doublé à chaque échec jusqu'au maximum
+WARM_UP_RETRY_DELAY = float(os.getenv("WARM_UP_RETRY_DELAY", "2"))
+WARM_UP_MAX_RETRY_DELAY = float(os.getenv("WARM_UP_MAX_RETRY_DELAY", "60"))
+
+
+class WarmUp:
+    """
+    Phase de préchauffage exécutée en arrière-plan après le démarrage.
+    Chaque étape initialise un sous-système (Chroma, modèles Ollama...) ; le
+    serveur répond dès le démarrage et /readyz indique quand tout est prêt.
+    Une étape non requise (required=False) n'empêche pas d'être prêt.
+    Une étape en échec (Ollama ou Chroma pas encore démarré) est réessayée avec
+    un délai croissant, jusqu'à ce qu'elle réussisse ou que stop() soit appelé.
+    """
+
+    def __init__(self, retry_delay: float = WARM_UP_RETRY_DELAY, max_retry_delay: float = WARM_UP_MAX_RETRY_DELAY):
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._steps = OrderedDict()
+        self._status = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, fn, required: bool = True):
+        """Ajoute une étape : fn() initialise le sous-système et lève une exception en cas d'échec."""
+        self._steps[name] = (fn, required)
+        self._status[name] = {"state": "pending", "required": required}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _run(self):
+        pending = list(self._steps)
+        delay = self.retry_delay
+        while pending and not self._stopping.is_set():
+            pending = [name for name in pending if not self._run_step(name)]
+            if pending:
+                print(f"Préchauffage : nouvel essai de {', '.join(pending)} dans {delay:g}s")
+                for name in pending:
+                    self._set(name, retry_in_seconds=delay)
+                self._stopping.wait(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+
+    def _run_step(self, name: str) -> bool:
+        fn, _ = self._steps[name]
+        with self._lock:
+            attempts = self._status[name].get("attempts", 0) + 1
+        self._set(name, state="running", attempts=attempts)
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            print(f"Échec du préchauffage '{name}' (essai {attempts}) : {e}")
+            self._set(name, state="error", error=str(e), seconds=round(time.perf_counter() - start, 2))
+            return False
+        self._set(name, state="ready", seconds=round(time.perf_counter() - start, 2), error=None, retry_in_seconds=None)
+        return True
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._status[name].update(fields)
+
+    def status(self) -> tuple:
+        """Retourne (prêt, détail par étape)."""
+        with self._lock:
+            details = {name: dict(status) for name, status in self._status.items()}
+        ready = all(status["state"] == "ready" for status in details.values() if status["required"])
+        return ready, details
@@ -1,19 +1,23 @@
 # api/main.py (Version 5: Finalisée et Nettoyée)
 import sys
 import os
+import json
+import asyncio
+import time
 import datetime
-from typing import Optional
+import uuid
+from typing import List, Optional
+from concurrent.futures import BrokenExecutor, TimeoutError
 
 # Ajoute le répertoire racine du projet au path pour permettre les imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Imports des librairies externes
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from fpdf import FPDF
 
 # Imports de nos modules internes
 # Note: On continue d'importer visualizer_node car il est utilisé en interne
@@ -25,17 +29,80 @@ from agents.agent_nodes import (
     visualizer_node,
     data_extractor_node
 )
-from memory.chromadb_client import add_text_to_memory
+from planning.graph_orchestrator import run_workflow, get_run_state, resume_workflow, rerun_node, get_checkpointed_workflow
+from agents.model_registry import model_registry, OLLAMA_WARM_ON_STARTUP
+from agents.llm_runtime import run_node, emit_event, stream_events, bypass_llm_cache, track_usage, llm_cache
+from memory.chromadb_client import add_text_to_memory, get_vector_store
+from memory import semantic_cache
+from memory.maintenance import memory_maintainer
+from memory.cache_store import flush_caches
+from tools.web_search import get_web_search_tool
+from tools.chart_renderer import chart_renderer
+from api.jobs import JobManager, JobQueueFull
+from api.single_flight import Flight, SingleFlight
+from api.persistence import PersistenceQueue
+from api.exports import ExportService, EXPORT_FORMATS, HISTORY_DIR
+from api.history_store import HistoryStore, HISTORY_PAGE_SIZE, KNOWN_AGENTS, REPORT_SUFFIX_LENGTH
+from api.lifecycle import WarmUp
+from tools.tracing import span, collect_trace, record_cache_lookup, summarize
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 # --- Initialisation de l'application FastAPI ---
 app = FastAPI(title="AutoGPT++ Agent Platform")
 
+@app.get(f"{chart_renderer.url_prefix}/{{filename}}")
+def chart_endpoint(filename: str):
+    """
+    Sert un graphique (déclaré avant le montage de /static, qui l'intercepterait sinon).
+    Chaque consultation compte pour l'éviction, et un graphique évincé est régénéré.
+    """
+    try:
+        path = chart_renderer.serve(filename)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Graphique introuvable.")
+    except (TimeoutError, BrokenExecutor):
+        # Les workers de rendu sont saturés ou viennent de tomber : le client peut réessayer
+        raise HTTPException(status_code=503, detail="Graphique en cours de génération, réessayez.",
+                            headers={"Retry-After": str(max(1, int(chart_renderer.timeout)))})
+    return FileResponse(path)
+
 # Monte le dossier 'static' pour servir les fichiers CSS/JS
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Configure le moteur de templates pour trouver les fichiers HTML
 templates = Jinja2Templates(directory="templates")
 
+# Pool de workers borné qui exécute les agents hors de la boucle d'événements
+job_manager = JobManager()
+
+# Les requêtes identiques simultanées partagent une seule exécution
+single_flight = SingleFlight()
+
+# File d'attente durable : Markdown et mémoire RAG sont écrits hors du chemin de la requête
+persistence_queue = PersistenceQueue()
+
+# Exportations (PDF...) des rapports, générées seulement quand elles sont demandées
+export_service = ExportService()
+
+# Index des exécutions (SQLite + FTS5) pour lister et rechercher l'historique sans parcourir /history
+history_store = HistoryStore()
+
+def warm_up_models():
+    failed = model_registry.warm_up()
+    if failed:
+        raise RuntimeError(f"Modèles indisponibles dans Ollama : {', '.join(failed)}")
+
+# Préchauffage en arrière-plan : les sous-systèmes lourds sont initialisés après le
+# démarrage (ou à la première utilisation), jamais à l'import du module
+warm_up = WarmUp()
+warm_up.register("memory", get_vector_store)
+warm_up.register("semantic_cache", semantic_cache.get_semantic_store)
+warm_up.register("workflow", get_checkpointed_workflow)
+# Migration : indexe les rapports de /history écrits avant l'existence de l'index
+warm_up.register("history", lambda: history_store.import_directory(HISTORY_DIR), required=False)
+if OLLAMA_WARM_ON_STARTUP:
+    warm_up.register("models", warm_up_models)
+
 # --- Modèles de Données Pydantic ---
 
 class AgentRequest(BaseModel):
@@ -43,46 +110,263 @@ class AgentRequest(BaseModel):
     agent: str
     objective: str
     context: Optional[str] = None
+    no_cache: bool = False # Ignore les réponses LLM en cache pour cette requête
+    include_timings: bool = False # Ajoute à la réponse le détail des durées (nœuds, LLM, recherche...)
 
 # --- Fonctions Utilitaires ---
 
-def save_result_and_update_memory(report_content: str, objective: str, agent_name: str):
+def write_markdown_report(payload: dict):
+    """Tâche de persistance : sauvegarde le rapport en Markdown dans /history."""
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    md_path = f"{payload['filename_base']}.md"
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(payload["report_content"])
+    print(f"Rapport sauvegardé en Markdown : {md_path}")
+
+def index_report_in_memory(payload: dict):
+    """Tâche de persistance : ajoute le rapport à la mémoire RAG (ChromaDB) pour l'auto-amélioration."""
+    print(f"Mise à jour de la mémoire RAG avec le résultat de l'agent '{payload['agent_name']}'...")
+    add_text_to_memory(
+        payload["report_content"],
+        {"source": "self_generated_report", "agent": payload["agent_name"], "objective": payload["objective"]}
+    )
+
+# Le Markdown passe avant l'indexation (lente) : l'identifiant du rapport est déjà envoyé au client
+persistence_queue.register("markdown", write_markdown_report, priority=1)
+# Le PDF est désormais généré à la demande (GET /reports/{id}/export) : les tâches
+# "pdf" mises en file par une version précédente sont simplement ignorées
+persistence_queue.register("pdf", lambda payload: None)
+persistence_queue.register("memory", index_report_in_memory)
+
+def save_result_and_update_memory(report_content: str, objective: str, agent_name: str, run_id: Optional[str] = None):
     """
-    1. Sauvegarde le rapport en Markdown et PDF dans le dossier /history.
-    2. Ajoute le contenu du rapport à la mémoire RAG (ChromaDB) pour l'auto-amélioration.
+    Met en file (sur disque) la sauvegarde du rapport en Markdown dans /history
+    et son ajout à la mémoire RAG. Les workers de persistance s'en chargent après
+    l'envoi de la réponse ; un échec est réessayé sans impacter l'utilisateur.
+    Les autres formats (PDF...) sont générés à la demande via l'identifiant retourné,
+    rendu unique par un suffixe tiré du run_id : deux exécutions lancées dans la même
+    seconde sur le même objectif n'écrasent pas leurs rapports.
     """
-    if not os.path.exists("history"):
-        os.makedirs("history")
-
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_objective = "".join(x for x in objective[:30] if x.isalnum() or x in " _-").strip()
-    filename_base = os.path.join("history", f"{timestamp}_{agent_name}_{safe_objective}")
+    suffix = (run_id or uuid.uuid4().hex)[:REPORT_SUFFIX_LENGTH]
+    report_id = f"{timestamp}_{agent_name}_{safe_objective}_{suffix}"
+    payload = {
+        "filename_base": os.path.join(HISTORY_DIR, report_id),
+        "report_content": report_content,
+        "objective": objective,
+        "agent_name": agent_name,
+    }
+    for kind in ("markdown", "memory"):
+        persistence_queue.enqueue(kind, payload)
+    emit_event("report", report_id=report_id, run_id=run_id)
+    return report_id
+
+def run_agent_request(agent: str, objective: str, context: Optional[str] = None, no_cache: bool = False,
+                      run_id: Optional[str] = None) -> str:
+    """
+    Exécute une requête d'agent. Bloquant : exécuté par le JobManager.
+    Un résultat antérieur pour un objectif quasi identique (cache sémantique) est
+    réutilisé tel quel. Si no_cache est vrai, tous les caches sont ignorés.
+    run_id identifie l'exécution dans l'historique et, pour le workflow, ses checkpoints.
+    """
+    run = {"run_id": run_id or uuid.uuid4().hex, "agent": agent, "objective": objective, "started_at": time.time()}
+
+    def produce() -> str:
+        if not no_cache:
+            output = lookup_semantic_cache(agent, objective, context)
+            run["semantic_cache_hit"] = output is not None
+            if output is not None:
+                return output
+        return dispatch_agent_request(agent, objective, context, run)
 
-    md_path = f"{filename_base}.md"
+    return execute_run(run, produce, context, no_cache)
+
+def execute_run(run: dict, produce, context: Optional[str] = None, no_cache: bool = False) -> str:
+    """
+    Exécute produce() (qui retourne le rapport) en mesurant l'usage LLM, puis met
+    le rapport en file de persistance et dans le cache sémantique (sauf s'il vient
+    de ce cache ou si l'exécution est dégradée). Chaque exécution, réussie ou non,
+    est indexée dans l'historique.
+    """
+    agent, objective = run["agent"], run["objective"]
+    output = None
     try:
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write(report_content)
-        print(f"Rapport sauvegardé en Markdown : {md_path}")
+        # Le nom de l'agent sert de label Prometheus : un nom inconnu ne doit pas créer de série
+        with span("request", agent if agent in KNOWN_AGENTS else "invalid", no_cache=no_cache):
+            with bypass_llm_cache(no_cache), track_usage() as usage:
+                try:
+                    output = produce()
+                finally:
+                    run.update(llm_calls=usage["calls"], cached_llm_calls=usage["cached_calls"],
+                               prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"])
+            if not run.get("semantic_cache_hit"):
+                report_id = save_result_and_update_memory(output, objective, agent, run["run_id"])
+                run.update(report_id=report_id, artifacts={"markdown": os.path.join(HISTORY_DIR, f"{report_id}.md")})
+
+                # Un résultat dégradé (graphique en échec...) ne doit pas être resservi pour des objectifs proches
+                if not no_cache and not run.get("degraded"):
+                    try:
+                        semantic_cache.store_result(agent, objective, output, context)
+                    except Exception as e:
+                        print(f"Erreur lors de l'enregistrement dans le cache sémantique : {e}")
+        run["status"] = "degraded" if run.get("degraded") else "succeeded"
+        return output
     except Exception as e:
-        print(f"Erreur lors de la sauvegarde du fichier Markdown : {e}")
-
-    pdf_path = f"{filename_base}.pdf"
+        run.update(status="failed", error=getattr(e, "detail", None) or str(e))
+        raise
+    finally:
+        run["finished_at"] = time.time()
+        run["duration_seconds"] = round(run["finished_at"] - run["started_at"], 3)
+        record_history(run, output)
+
+def record_history(run: dict, output: Optional[str]):
+    """L'indexation de l'historique ne doit jamais faire échouer la requête."""
     try:
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        encoded_content = report_content.encode('latin-1', 'replace').decode('latin-1')
-        pdf.multi_cell(0, 10, encoded_content)
-        pdf.output(pdf_path)
-        print(f"Rapport sauvegardé en PDF : {pdf_path}")
+        history_store.record(run, output or "")
     except Exception as e:
-        print(f"Erreur lors de la création du fichier PDF : {e}")
+        print(f"Erreur lors de l'indexation de l'historique : {e}")
 
-    print(f"Mise à jour de la mémoire RAG avec le résultat de l'agent '{agent_name}'...")
-    add_text_to_memory(
-        report_content,
-        {"source": "self_generated_report", "agent": agent_name, "objective": objective}
-    )
+def lookup_semantic_cache(agent: str, objective: str, context: Optional[str] = None):
+    """Cherche un résultat réutilisable ; une panne du cache ne doit jamais faire échouer la requête."""
+    try:
+        with span("retrieval", "semantic_cache") as record:
+            hit = semantic_cache.lookup_result(agent, objective, context)
+            record["cache_hit"] = hit is not None
+    except Exception as e:
+        print(f"Erreur lors de la consultation du cache sémantique : {e}")
+        return None
+    record_cache_lookup("semantic", hit is not None)
+    if hit is None:
+        return None
+    print(f"--- CACHE SÉMANTIQUE : réutilisation du résultat de '{hit['objective']}' (similarité {hit['similarity']}) ---")
+    return hit["output"]
+
+def dispatch_agent_request(agent: str, objective: str, context: Optional[str] = None, run: Optional[dict] = None) -> str:
+    """
+    Dirige une requête vers un agent simple ou un workflow d'agents complexe
+    et retourne le texte produit. Si une étape échoue sans empêcher le rapport
+    (graphique non généré), run["degraded"] et run["error"] sont renseignés.
+    """
+    run = {} if run is None else run
+    # --- CAS 1: Le workflow autonome Analyste-Visualiseur ---
+    if agent == "analyst_visualizer":
+        print(f"--- DÉMARRAGE DU WORKFLOW : Analyste-Visualiseur ---")
+
+        # Étape 1: L'agent chercheur trouve l'information
+        research_state = run_node("researcher", researcher_node, {"objective": objective})
+
+        # Vérifie si le chercheur a trouvé quelque chose
+        if not research_state.get("research_summary"):
+            raise HTTPException(status_code=404, detail="La recherche n'a retourné aucune information pertinente.")
+
+        # Étape 2: L'agent extracteur transforme le texte en données
+        extraction_state = run_node("data_extractor", data_extractor_node, research_state)
+
+        # Vérifie si l'extracteur a trouvé des données
+        extracted_data = extraction_state.get("research_summary")
+        if not extracted_data:
+             raise HTTPException(status_code=500, detail="Échec de l'extraction des données. Le texte de recherche n'était peut-être pas adapté.")
+
+        # Étape 3: L'agent visualiseur crée le graphique
+        visualizer_state = run_node("visualizer", visualizer_node, {
+            "objective": objective,
+            "research_summary": extracted_data # Le visualiseur attend les données ici
+        })
+
+        if visualizer_state.get("error"):
+            run.update(degraded=True, error=f"Visualisation en échec : {visualizer_state['error']}")
+
+        # Étape 4: On combine les résultats pour un rapport final
+        final_report = (
+            f"# Rapport d'Analyse : {objective}\n\n"
+            f"## Résumé de la Recherche\n\n"
+            f"{research_state['research_summary']}\n\n"
+            f"## Visualisation des Données\n\n"
+            f"{visualizer_state['report']}"
+        )
+
+        return final_report
+
+    # --- CAS 2: Le workflow complet planificateur → chercheur → codeur → rédacteur ---
+    if agent == "workflow":
+        # Le run_id de l'historique sert d'identifiant de thread : /workflows/{run_id} fonctionne aussi après un succès
+        run_id = run["run_id"] if "run_id" in run else uuid.uuid4().hex
+        try:
+            # Le cache sémantique est déjà consulté par run_agent_request
+            final_state = run_workflow(objective, use_cache=False, run_id=run_id)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Workflow {run_id} interrompu : {e}. Reprise possible via POST /workflows/{run_id}/resume",
+            )
+        return final_state["report"]
+
+    # --- CAS 3: Les agents simples qui peuvent être appelés directement ---
+    agent_functions = {
+        "planner": planner_node,
+        "researcher": researcher_node,
+        "coder": coder_node,
+        "writer": writer_node,
+        # Le visualiseur a été retiré, il ne peut plus être appelé directement
+    }
+    agent_func = agent_functions.get(agent)
+
+    if not agent_func:
+        raise HTTPException(status_code=400, detail=f"Agent '{agent}' non valide ou non appelable directement.")
+
+    initial_state = {
+        "objective": objective,
+        "research_summary": context or "", # Utilise le contexte s'il est fourni
+    }
+
+    print(f"--- DÉMARRAGE DE L'AGENT INDIVIDUEL : {agent.upper()} ---")
+    result_state = run_node(agent, agent_func, initial_state)
+    print(f"--- AGENT {agent.upper()} TERMINÉ ---")
+
+    output_key_map = {
+        "planner": "plan",
+        "researcher": "research_summary",
+        "coder": "code",
+        "writer": "report"
+    }
+    output = result_state.get(output_key_map.get(agent))
+
+    if output is None:
+        raise HTTPException(status_code=500, detail="L'agent n'a produit aucun résultat.")
+
+    return output
+
+def run_flight(flight: Flight, agent: str, objective: str, context: Optional[str], no_cache: bool) -> str:
+    """Exécute la requête en publiant ses événements à toutes les requêtes rattachées au flight."""
+    with stream_events(flight.publish), collect_trace(flight.trace):
+        return run_agent_request(agent, objective, context, no_cache, run_id=flight.run_id)
+
+def submit_agent_job(request: AgentRequest) -> tuple:
+    """
+    Soumet la requête au JobManager, ou la rattache à une exécution identique
+    déjà en cours (single-flight). Retourne (flight, coalesced) ; 400 si l'agent est
+    inconnu, 503 si la file est pleine.
+    """
+    def start(flight: Flight):
+        # Connu dès la soumission : renvoyé au client avant la fin de l'exécution
+        flight.run_id = uuid.uuid4().hex
+        return job_manager.submit(
+            run_flight, flight, request.agent, request.objective, request.context, request.no_cache,
+            description=f"{request.agent}: {request.objective[:60]}",
+        )
+
+    # Rejeté avant la soumission : ni job, ni série de métriques, ni entrée de statistiques pour un agent inconnu
+    if request.agent not in KNOWN_AGENTS:
+        raise HTTPException(status_code=400, detail=f"Agent '{request.agent}' non valide ou non appelable directement.")
+    key = SingleFlight.key(request.agent, request.objective, request.context, request.no_cache)
+    try:
+        flight, coalesced = single_flight.submit(key, start, agent=request.agent)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if coalesced:
+        print(f"--- REQUÊTE REGROUPÉE avec le job {flight.job.id} ({flight.requests} requêtes) ---")
+    return flight, coalesced
 
 # --- Endpoints de l'API ---
 
@@ -94,90 +378,291 @@ async def read_root(request: Request):
 @app.post("/execute_agent")
 async def execute_agent_endpoint(request: AgentRequest):
     """
-    Endpoint principal qui reçoit une requête et la dirige vers
-    un agent simple ou un workflow d'agents complexe.
+    Endpoint principal : exécute l'agent demandé dans le pool de workers
+    et attend son résultat sans bloquer la boucle d'événements.
     """
+    flight, _ = submit_agent_job(request)
+    job = flight.job
     try:
-        # --- CAS 1: Le workflow autonome Analyste-Visualiseur ---
-        if request.agent == "analyst_visualizer":
-            print(f"--- DÉMARRAGE DU WORKFLOW : Analyste-Visualiseur ---")
-
-            # Étape 1: L'agent chercheur trouve l'information
-            research_state = researcher_node({"objective": request.objective})
-            
-            # Vérifie si le chercheur a trouvé quelque chose
-            if not research_state.get("research_summary"):
-                raise HTTPException(status_code=404, detail="La recherche n'a retourné aucune information pertinente.")
-
-            # Étape 2: L'agent extracteur transforme le texte en données
-            extraction_state = data_extractor_node(research_state)
-
-            # Vérifie si l'extracteur a trouvé des données
-            extracted_data = extraction_state.get("research_summary")
-            if not extracted_data:
-                 raise HTTPException(status_code=500, detail="Échec de l'extraction des données. Le texte de recherche n'était peut-être pas adapté.")
-
-            # Étape 3: L'agent visualiseur crée le graphique
-            visualizer_state = visualizer_node({
-                "objective": request.objective,
-                "research_summary": extracted_data # Le visualiseur attend les données ici
-            })
-
-            # Étape 4: On combine les résultats pour un rapport final
-            final_report = (
-                f"# Rapport d'Analyse : {request.objective}\n\n"
-                f"## Résumé de la Recherche\n\n"
-                f"{research_state['research_summary']}\n\n"
-                f"## Visualisation des Données\n\n"
-                f"{visualizer_state['report']}"
-            )
-
-            save_result_and_update_memory(final_report, request.objective, request.agent)
-            return JSONResponse(content={"output": final_report})
-
-        # --- CAS 2: Les agents simples qui peuvent être appelés directement ---
-        else:
-            agent_functions = {
-                "planner": planner_node,
-                "researcher": researcher_node,
-                "coder": coder_node,
-                "writer": writer_node,
-                # Le visualiseur a été retiré, il ne peut plus être appelé directement
-            }
-            agent_func = agent_functions.get(request.agent)
-
-            if not agent_func:
-                raise HTTPException(status_code=400, detail=f"Agent '{request.agent}' non valide ou non appelable directement.")
-
-            initial_state = {
-                "objective": request.objective,
-                "research_summary": request.context or "", # Utilise le contexte s'il est fourni
-            }
-
-            print(f"--- DÉMARRAGE DE L'AGENT INDIVIDUEL : {request.agent.upper()} ---")
-            result_state = agent_func(initial_state)
-            print(f"--- AGENT {request.agent.upper()} TERMINÉ ---")
-
-            output_key_map = {
-                "planner": "plan",
-                "researcher": "research_summary",
-                "coder": "code",
-                "writer": "report"
-            }
-            output = result_state.get(output_key_map.get(request.agent))
-
-            if output is None:
-                raise HTTPException(status_code=500, detail="L'agent n'a produit aucun résultat.")
-
-            save_result_and_update_memory(output, request.objective, request.agent)
-            return JSONResponse(content={"output": output})
-
+        output = await job_manager.wait(job)
+        content = {"output": output, "run_id": flight.run_id}
+        if request.include_timings:
+            content["timings"] = summarize(flight.trace)
+        return JSONResponse(content=content)
     except Exception as e:
         # En cas d'erreur dans n'importe quelle branche, on log et on retourne une erreur 500
         print(f"ERREUR CRITIQUE dans l'endpoint pour l'agent '{request.agent}': {e}")
         # On retourne le message d'erreur au frontend pour le débogage
         raise HTTPException(status_code=500, detail=str(e))
 
+def format_sse(event: str, data: dict) -> str:
+    """Formate un événement au format Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/execute_agent/stream")
+async def execute_agent_stream_endpoint(request: AgentRequest):
+    """
+    Variante en streaming de /execute_agent : les tokens sont envoyés au navigateur
+    (Server-Sent Events) dès que le modèle les produit, avec les événements
+    node_start / node_end, puis un événement final `done` ou `error`.
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def publish(event: str, data: dict):
+        # Appelé depuis le thread du worker : on repasse par la boucle d'événements
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    # Une requête identique déjà en cours est partagée : ses événements passés sont rejoués
+    flight, coalesced = submit_agent_job(request)
+    job = flight.job
+    flight.subscribe(publish)
+    job.future.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, (None, None)))
+
+    async def event_stream():
+        yield format_sse("job", {"job_id": job.id, "run_id": flight.run_id, "coalesced": coalesced})
+        while True:
+            event, data = await events.get()
+            if event is None:
+                break
+            yield format_sse(event, data)
+        if job.status == "succeeded":
+            done = {"output": job.result, "run_id": flight.run_id}
+            if request.include_timings:
+                done["timings"] = summarize(flight.trace)
+            yield format_sse("done", done)
+        else:
+            print(f"ERREUR CRITIQUE dans le streaming pour l'agent '{request.agent}': {job.error}")
+            yield format_sse("error", {"detail": job.error})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/jobs", status_code=202)
+async def submit_job_endpoint(request: AgentRequest):
+    """Soumet une requête en arrière-plan et retourne immédiatement l'identifiant du job."""
+    flight, coalesced = submit_agent_job(request)
+    return {**flight.job.to_dict(), "run_id": flight.run_id, "coalesced": coalesced}
+
+@app.get("/jobs/stats")
+async def job_stats_endpoint():
+    """Occupation du pool de workers et requêtes identiques regroupées (single-flight)."""
+    return {**job_manager.stats(), "single_flight": single_flight.stats()}
+
+@app.get("/jobs/{job_id}")
+async def job_status_endpoint(job_id: str):
+    """Retourne le statut d'un job (queued, running, succeeded, failed)."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' introuvable.")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/result")
+async def job_result_endpoint(job_id: str):
+    """Retourne le résultat d'un job terminé, ou 202 s'il est encore en cours."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' introuvable.")
+    if not job.done:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    return JSONResponse(content={"output": job.result})
+
+@app.get("/workflows/{run_id}")
+async def workflow_state_endpoint(run_id: str):
+    """Dernier état sauvegardé d'un workflow et les nœuds restant à exécuter."""
+    try:
+        return get_run_state(run_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def submit_workflow_job(fn, *args, description: str):
+    try:
+        return job_manager.submit(fn, *args, description=description)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def run_workflow_continuation(source: str, run_id: str, operation, *args) -> dict:
+    """
+    Reprise ou ré-exécution d'un workflow (job). Quand elle produit un nouveau
+    rapport, celui-ci suit le même chemin qu'une exécution normale (Markdown,
+    mémoire, cache sémantique, historique, avec source = "resume" ou "rerun").
+    Retourne l'état final, avec l'identifiant du rapport s'il a été enregistré.
+    """
+    snapshot = get_run_state(run_id)
+    if not snapshot["next"] and operation is resume_workflow:
+        # Workflow déjà terminé : son rapport a déjà été enregistré
+        return resume_workflow(run_id)
+
+    state = {}
+
+    def produce() -> str:
+        state.update(operation(run_id, *args))
+        if not state.get("report"):
+            raise RuntimeError(f"Le workflow {run_id} n'a pas produit de rapport.")
+        return state["report"]
+
+    run = {"run_id": uuid.uuid4().hex, "agent": "workflow", "objective": snapshot["values"].get("objective", ""),
+           "started_at": time.time(), "source": source}
+    execute_run(run, produce)
+    state.update(run_id=run_id, report_id=run.get("report_id"))
+    return state
+
+@app.post("/workflows/{run_id}/resume", status_code=202)
+async def resume_workflow_endpoint(run_id: str):
+    """Reprend un workflow depuis son dernier nœud terminé (en arrière-plan, voir /jobs)."""
+    return submit_workflow_job(run_workflow_continuation, "resume", run_id, resume_workflow,
+                               description=f"resume {run_id}").to_dict()
+
+@app.post("/workflows/{run_id}/nodes/{node}/rerun", status_code=202)
+async def rerun_workflow_node_endpoint(run_id: str, node: str, resume: bool = False):
+    """
+    Ré-exécute un seul nœud avec l'état qu'il avait reçu ; resume=true enchaîne les
+    suivants et enregistre le nouveau rapport comme une exécution normale.
+    """
+    if not resume:
+        return submit_workflow_job(rerun_node, run_id, node, False, description=f"rerun {node} {run_id}").to_dict()
+    return submit_workflow_job(run_workflow_continuation, "rerun", run_id, rerun_node, node, True,
+                               description=f"rerun {node} {run_id}").to_dict()
+
+@app.get("/cache/stats")
+async def cache_stats_endpoint():
+    """Compteurs des caches (LLM, recherche web, graphiques) : hits, misses, évictions, latence du backend."""
+    return {
+        "llm": llm_cache.stats(),
+        "web_search": get_web_search_tool().stats(),
+        "charts": chart_renderer.stats(),
+        "exports": export_service.stats(),
+    }
+
+class ExportRequest(BaseModel):
+    """Exportation groupée de plusieurs rapports."""
+    report_ids: List[str]
+    format: str = "pdf"
+
+@app.get("/reports/{report_id}/export")
+async def export_report_endpoint(report_id: str, format: str = "pdf"):
+    """Télécharge un rapport de /history dans le format demandé (généré puis mis en cache)."""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format '{format}' non supporté ({', '.join(EXPORT_FORMATS)}).")
+    try:
+        path = await asyncio.get_running_loop().run_in_executor(None, export_service.export, report_id, format)
+    except KeyError as e:
+        if persistence_queue.is_pending("markdown", "filename_base", os.path.join(HISTORY_DIR, report_id)):
+            # Le rapport est connu mais pas encore écrit par la file de persistance
+            raise HTTPException(status_code=409, detail=f"Rapport '{report_id}' en cours d'enregistrement, réessayez.",
+                                headers={"Retry-After": "2"})
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return FileResponse(path, media_type=EXPORT_FORMATS[format][1], filename=os.path.basename(path))
+
+@app.post("/reports/export", status_code=202)
+async def export_reports_endpoint(request: ExportRequest):
+    """Prépare l'exportation de plusieurs rapports en arrière-plan (voir /jobs) ; le résultat donne les URLs."""
+    if request.format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format '{request.format}' non supporté ({', '.join(EXPORT_FORMATS)}).")
+
+    def export_batch(report_ids: list, fmt: str) -> dict:
+        results = export_service.export_many(report_ids, fmt)
+        for report_id, result in results.items():
+            if "path" in result:
+                result["url"] = f"/reports/{report_id}/export?format={fmt}"
+                del result["path"]
+        return results
+
+    try:
+        job = job_manager.submit(export_batch, request.report_ids, request.format,
+                                 description=f"export {len(request.report_ids)} rapports ({request.format})")
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
+
+@app.get("/history")
+async def history_list_endpoint(limit: int = HISTORY_PAGE_SIZE, offset: int = 0, agent: Optional[str] = None):
+    """Exécutions passées, les plus récentes d'abord (paginé : limit, offset ; filtre optionnel par agent)."""
+    return history_store.list(limit, offset, agent)
+
+@app.get("/history/search")
+async def history_search_endpoint(q: str, limit: int = HISTORY_PAGE_SIZE, offset: int = 0, agent: Optional[str] = None):
+    """Recherche plein texte dans les objectifs et les rapports (paginé)."""
+    return history_store.search(q, limit, offset, agent)
+
+@app.get("/history/{run_id}")
+async def history_run_endpoint(run_id: str):
+    """Détail d'une exécution : durées, tokens, fichiers produits."""
+    try:
+        return history_store.get(run_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+@app.get("/memory/stats")
+async def memory_stats_endpoint():
+    """Taille de la mémoire RAG par source, latence des requêtes, doublons fusionnés et chunks expirés."""
+    return await asyncio.get_running_loop().run_in_executor(None, memory_maintainer.stats)
+
+@app.post("/memory/maintenance", status_code=202)
+async def memory_maintenance_endpoint():
+    """Lance immédiatement une passe de maintenance de la mémoire (en arrière-plan, voir /jobs)."""
+    return submit_workflow_job(memory_maintainer.run_pass, description="maintenance mémoire").to_dict()
+
+@app.get("/persistence/status")
+async def persistence_status_endpoint():
+    """Profondeur de la file de persistance (tâches en attente, en cours, en échec)."""
+    return persistence_queue.status()
+
+@app.delete("/cache/semantic")
+async def invalidate_semantic_cache_endpoint(agent: Optional[str] = None):
+    """Invalide les résultats du cache sémantique (d'un agent, ou de tous)."""
+    semantic_cache.invalidate(agent)
+    return {"invalidated": agent or "all"}
+
+@app.get("/models")
+async def models_endpoint():
+    """Modèle utilisé par chaque nœud, fallbacks, latences moyennes et nœuds dégradés."""
+    return model_registry.stats()
+
+@app.on_event("startup")
+def start_persistence():
+    persistence_queue.start()
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Métriques Prometheus : histogrammes de durée par étape, tokens LLM, hits/misses des caches."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/healthz")
+async def liveness_endpoint():
+    """Liveness : le processus répond (sans vérifier Chroma ni Ollama)."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness_endpoint():
+    """Readiness : 200 quand le préchauffage est terminé, 503 avec le détail sinon."""
+    ready, details = warm_up.status()
+    details["persistence"] = {"state": "ready" if persistence_queue.running else "pending", "required": True}
+    ready = ready and details["persistence"]["state"] == "ready"
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "checks": details})
+
+@app.on_event("startup")
+def start_warm_up():
+    # Le démarrage n'attend pas : Chroma, le workflow et les modèles Ollama sont chargés en arrière-plan
+    warm_up.start()
+    model_registry.start_keep_warm()
+    memory_maintainer.start()
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    warm_up.stop()
+    job_manager.shutdown()
+    persistence_queue.stop()
+    memory_maintainer.stop()
+    chart_renderer.shutdown()
+    export_service.shutdown()
+    flush_caches()
+
 # --- Démarrage du Serveur ---
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,190 @@
+# api/persistence.py
+import os
+import json
+import time
+import sqlite3
+import threading
+from tools.tracing import span
+
+# File d'attente durable des tâches de persistance (fichiers, PDF, mémoire RAG)
+PERSISTENCE_QUEUE_PATH = os.getenv("PERSISTENCE_QUEUE_PATH", "./history/persistence_queue.sqlite3")
+PERSISTENCE_WORKERS = int(os.getenv("PERSISTENCE_WORKERS", "1"))
+PERSISTENCE_MAX_ATTEMPTS = int(os.getenv("PERSISTENCE_MAX_ATTEMPTS", "5"))
+# Délai avant le premier nouvel essai, doublé à chaque échec
+PERSISTENCE_RETRY_DELAY = float(os.getenv("PERSISTENCE_RETRY_DELAY", "2"))
+PERSISTENCE_MAX_RETRY_DELAY = float(os.getenv("PERSISTENCE_MAX_RETRY_DELAY", "300"))
+
+
+class PersistenceQueue:
+    """
+    File d'attente sur disque (SQLite) traitée par des threads en arrière-plan.
+    Chaque tâche a un type (`kind`) associé à un handler via register().
+    Une tâche en échec est réessayée avec un délai exponentiel, puis marquée
+    `failed` après max_attempts tentatives. Les tâches survivent à un redémarrage.
+    Parmi les tâches prêtes, celles de plus haute priorité passent en premier
+    (une écriture de fichier rapide n'attend pas derrière une indexation lente).
+    """
+
+    def __init__(self, path: str = PERSISTENCE_QUEUE_PATH, workers: int = PERSISTENCE_WORKERS,
+                 max_attempts: int = PERSISTENCE_MAX_ATTEMPTS, retry_delay: float = PERSISTENCE_RETRY_DELAY,
+                 max_retry_delay: float = PERSISTENCE_MAX_RETRY_DELAY):
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._handlers = {}
+        self._priorities = {}
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self.completed = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, created_at REAL NOT NULL, last_error TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, next_attempt_at)")
+            self._conn.commit()
+        return self._conn
+
+    def register(self, kind: str, handler, priority: int = 0):
+        """Associe un type de tâche à la fonction handler(payload: dict) ; priority plus haute = traitée avant."""
+        self._handlers[kind] = handler
+        self._priorities[kind] = priority
+
+    def is_pending(self, kind: str, field: str, value) -> bool:
+        """Vrai si une tâche `kind` dont le payload a field == value attend encore (ou est en cours)."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT 1 FROM tasks WHERE kind = ? AND status != 'failed' AND json_extract(payload, ?) = ? LIMIT 1",
+                (kind, f"$.{field}", value),
+            ).fetchone()
+        return row is not None
+
+    def enqueue(self, kind: str, payload: dict):
+        """Enregistre une tâche sur disque et réveille les workers."""
+        if kind not in self._handlers:
+            raise ValueError(f"Aucun handler enregistré pour les tâches '{kind}'.")
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT INTO tasks (kind, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+            db.commit()
+        self._wakeup.set()
+
+    def start(self):
+        """Démarre les workers. Les tâches interrompues par un arrêt brutal sont reprises."""
+        if self._threads:
+            return
+        with self._lock:
+            db = self._db()
+            db.execute("UPDATE tasks SET status = 'pending' WHERE status = 'running'")
+            db.commit()
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"persistence-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def _claim(self):
+        """Réserve la prochaine tâche prête, ou retourne None."""
+        # Priorité par type, calculée depuis les handlers enregistrés (pas de colonne à migrer)
+        priorities = [(kind, priority) for kind, priority in self._priorities.items() if priority]
+        priority = "CASE kind " + " ".join("WHEN ? THEN ?" for _ in priorities) + " ELSE 0 END" if priorities else "0"
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT id, kind, payload, attempts FROM tasks WHERE status = 'pending' "
+                f"AND next_attempt_at <= ? ORDER BY {priority} DESC, next_attempt_at, id LIMIT 1",
+                (time.time(), *[value for pair in priorities for value in pair]),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE tasks SET status = 'running' WHERE id = ?", (row[0],))
+            db.commit()
+            return row
+
+    def _seconds_until_next_task(self) -> float:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT MIN(next_attempt_at) FROM tasks WHERE status = 'pending'"
+            ).fetchone()
+        if row[0] is None:
+            return 60.0
+        return max(0.0, min(60.0, row[0] - time.time()))
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            task = self._claim()
+            if task is None:
+                self._wakeup.wait(self._seconds_until_next_task())
+                self._wakeup.clear()
+                continue
+            self._process(*task)
+
+    def _process(self, task_id: int, kind: str, payload: str, attempts: int):
+        try:
+            with span("persistence", kind):
+                self._handlers[kind](json.loads(payload))
+        except Exception as e:
+            attempts += 1
+            status = "failed" if attempts >= self.max_attempts else "pending"
+            delay = min(self.max_retry_delay, self.retry_delay * (2 ** (attempts - 1)))
+            print(f"Erreur de persistance ({kind}, tentative {attempts}/{self.max_attempts}) : {e}")
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "UPDATE tasks SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (status, attempts, time.time() + delay, str(e), task_id),
+                )
+                db.commit()
+            return
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            db.commit()
+            self.completed += 1
+
+    def status(self) -> dict:
+        """État de la file : profondeur par statut et âge de la plus ancienne tâche en attente."""
+        with self._lock:
+            db = self._db()
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+            by_kind = dict(db.execute(
+                "SELECT kind, COUNT(*) FROM tasks WHERE status != 'failed' GROUP BY kind"
+            ).fetchall())
+            oldest = db.execute("SELECT MIN(created_at) FROM tasks WHERE status != 'failed'").fetchone()[0]
+        return {
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "failed": counts.get("failed", 0),
+            "backlog_by_kind": by_kind,
+            "oldest_pending_seconds": round(time.time() - oldest, 1) if oldest else 0.0,
+            "completed": self.completed,
+            "workers": len(self._threads),
+        }
@@ -0,0 +1,96 @@
+# api/single_flight.py
+import hashlib
+import json
+import threading
+from collections import Counter
+
+
+class Flight:
+    """
+    Une exécution en cours, partagée par toutes les requêtes identiques.
+    Les événements de streaming sont conservés pour qu'une requête arrivée en
+    cours de route reçoive aussi ceux déjà émis.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.job = None
+        # Identifiant de l'exécution (historique, checkpoints du workflow), partagé par les requêtes regroupées
+        self.run_id = None
+        self.requests = 1
+        # Spans de l'exécution (voir tools.tracing), pour le détail des durées
+        self.trace = []
+        self._events = []
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def publish(self, event: str, data: dict):
+        """Puits d'événements de l'exécution (voir agents.llm_runtime.stream_events)."""
+        with self._lock:
+            self._events.append((event, data))
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(event, data)
+
+    def subscribe(self, callback):
+        """Rejoue les événements déjà émis puis transmet les suivants à callback(event, data)."""
+        with self._lock:
+            for event, data in self._events:
+                callback(event, data)
+            self._subscribers.append(callback)
+
+
+class SingleFlight:
+    """
+    Regroupe les requêtes identiques simultanées : la première lance l'exécution,
+    les suivantes se rattachent à son job et reçoivent le même résultat, sans
+    nouvel appel au modèle ni doublon dans l'historique ou la mémoire.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.coalesced = 0
+        self.coalesced_by_agent = Counter()
+
+    @staticmethod
+    def key(agent: str, objective: str, context: str = None, no_cache: bool = False) -> str:
+        # Espaces normalisés : des objectifs qui ne diffèrent que par la mise en forme sont identiques
+        normalize = lambda text: " ".join((text or "").split())
+        payload = json.dumps([agent, normalize(objective), normalize(context), bool(no_cache)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(self, key: str, start, agent: str = "") -> tuple:
+        """
+        Retourne (flight, coalesced). Si aucune exécution identique n'est en cours,
+        start(flight) est appelé pour créer le job, sinon le flight existant est réutilisé.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and not flight.job.done:
+                flight.requests += 1
+                self.coalesced += 1
+                self.coalesced_by_agent[agent] += 1
+                return flight, True
+            flight = Flight(key)
+            # Si start() lève une exception (file pleine), rien n'est enregistré
+            flight.job = start(flight)
+            self._flights[key] = flight
+            self.started += 1
+        flight.job.future.add_done_callback(lambda _: self._finished(flight))
+        return flight, False
+
+    def _finished(self, flight: Flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "started": self.started,
+                "coalesced": self.coalesced,
+                "coalesced_by_agent": dict(self.coalesced_by_agent),
+            }
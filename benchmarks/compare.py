@@ -0,0 +1,91 @@
+# benchmarks/compare.py
+"""
+Compares two benchmark reports (see benchmarks/run.py) and fails on regressions.
+
+    python benchmarks/compare.py BASE.json HEAD.json [--threshold 0.10]
+
+A metric regresses when it is worse than the base by more than the threshold
+(relative) and by more than a small absolute margin, so that noise on very fast
+scenarios is not reported. Exits with 1 when any scenario regressed or failed.
+"""
+import sys
+import json
+import argparse
+
+# metric -> (path in the scenario result, higher is worse, absolute margin)
+METRICS = {
+    "p50_ms": (("latency_ms", "p50"), True, 2.0),
+    "p95_ms": (("latency_ms", "p95"), True, 5.0),
+    "throughput_per_s": (("throughput_per_s",), False, 0.05),
+    "peak_rss_mb": (("peak_rss_mb",), True, 10.0),
+}
+
+def metric(result: dict, path: tuple):
+    for key in path:
+        result = (result or {}).get(key)
+    return result
+
+def compare(base: dict, head: dict, threshold: float) -> tuple:
+    """Returns (table rows, regressions) for the scenarios present in both reports."""
+    rows, regressions = [], []
+    for name, head_result in head["scenarios"].items():
+        base_result = base["scenarios"].get(name)
+        if base_result is None:
+            rows.append((name, "-", "-", "-", "-", "new scenario"))
+            continue
+        if head_result.get("failed"):
+            rows.append((name, "-", "-", "-", "-", "FAILED"))
+            regressions.append(f"{name}: failed")
+            continue
+        for label, (path, higher_is_worse, margin) in METRICS.items():
+            before, after = metric(base_result, path), metric(head_result, path)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            worse = after - before if higher_is_worse else before - after
+            status = ""
+            if worse > margin and worse > threshold * abs(before):
+                status = "REGRESSION"
+                regressions.append(f"{name} {label}: {before} -> {after} ({change:+.1%})")
+            elif -worse > margin and -worse > threshold * abs(before):
+                status = "improved"
+            rows.append((name, label, before, after, f"{change:+.1%}", status))
+        if head_result.get("error_count", 0) > base_result.get("error_count", 0):
+            regressions.append(f"{name}: {base_result.get('error_count', 0)} -> {head_result['error_count']} errors")
+    return rows, regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change allowed (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+
+    print(f"base: {base['git']['commit']}{' (dirty)' if base['git']['dirty'] else ''}  {base['created_at']}")
+    print(f"head: {head['git']['commit']}{' (dirty)' if head['git']['dirty'] else ''}  {head['created_at']}")
+    if base.get("fakes") != head.get("fakes"):
+        print("WARNING: the reports were produced with different fake settings; the numbers are not comparable.")
+    if (base.get("python"), base.get("platform")) != (head.get("python"), head.get("platform")):
+        print("WARNING: the reports come from different Python versions or machines.")
+
+    rows, regressions = compare(base, head, args.threshold)
+    widths = [max(len(str(row[i])) for row in rows + [("scenario", "metric", "base", "head", "change", "")])
+              for i in range(6)]
+    for row in [("scenario", "metric", "base", "head", "change", "")] + rows:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regression over {args.threshold:.0%}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
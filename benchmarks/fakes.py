@@ -0,0 +1,104 @@
+# benchmarks/fakes.py
+"""
+Deterministic local stand-ins for Ollama (chat and embeddings) and web search.
+The same input always produces the same output, after a configurable delay,
+so benchmark runs are reproducible and need neither a model nor the network.
+"""
+import math
+import time
+import random
+import hashlib
+from typing import Any, Iterator, List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+VOCABULARY = (
+    "analysis market energy solar battery network model data growth policy region cost "
+    "demand supply research design python module test service latency cache report "
+    "population europe asia africa america value trend forecast risk plan step review"
+).split()
+
+def _rng(text: str) -> random.Random:
+    return random.Random(int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16))
+
+def fake_completion(prompt: str, output_tokens: int) -> str:
+    """A numbered list of pseudo-words seeded by the prompt, or label:value pairs for the data extractor."""
+    rng = _rng(prompt)
+    if "Données extraites" in prompt:
+        labels = rng.sample(VOCABULARY, 4)
+        return ", ".join(f"{label.capitalize()}:{rng.uniform(0.5, 10):.2f}" for label in labels)
+    lines, words = [], 0
+    while words < output_tokens:
+        line = [rng.choice(VOCABULARY) for _ in range(8)]
+        lines.append(f"{len(lines) + 1}. {' '.join(line)}")
+        words += len(line)
+    return "\n".join(lines)
+
+class FakeChatModel(BaseChatModel):
+    """Chat model answering after `latency` seconds plus `token_latency` per generated word."""
+
+    model: str = "fake-llm"
+    temperature: float = 0.0
+    latency: float = 0.05
+    token_latency: float = 0.0005
+    output_tokens: int = 200
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _completion(self, messages: List[BaseMessage]) -> str:
+        return fake_completion("\n".join(str(message.content) for message in messages), self.output_tokens)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._completion(messages)
+        time.sleep(self.latency + self.token_latency * len(text.split()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for line in self._completion(messages).splitlines(keepends=True):
+            time.sleep(self.token_latency * len(line.split()))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=line))
+
+class FakeEmbeddings(Embeddings):
+    """Unit vectors seeded by the text; each call waits `latency` plus `text_latency` per text."""
+
+    def __init__(self, dimensions: int = 384, latency: float = 0.01, text_latency: float = 0.001):
+        self.model = "fake-embeddings"
+        self.dimensions = dimensions
+        self.latency = latency
+        self.text_latency = text_latency
+
+    def _vector(self, text: str) -> list:
+        rng = _rng(text)
+        vector = [rng.gauss(0, 1) for _ in range(self.dimensions)]
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts: list) -> list:
+        time.sleep(self.latency + self.text_latency * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
+
+class FakeSearchBackend:
+    """Web search backend returning `result_chars` of deterministic text after `latency` seconds."""
+    name = "fake"
+
+    def __init__(self, latency: float = 0.2, result_chars: int = 2000):
+        self.latency = latency
+        self.result_chars = result_chars
+
+    def search(self, query: str) -> str:
+        time.sleep(self.latency)
+        rng = _rng(query)
+        words = []
+        while sum(len(word) + 1 for word in words) < self.result_chars:
+            words.append(rng.choice(VOCABULARY))
+        return " ".join(words)
@@ -0,0 +1,61 @@
+# benchmarks/import_time.py
+"""
+Measures how long `import api.main` takes in a fresh interpreter and fails when
+it exceeds the budget, so that heavy import-time side effects do not creep back.
+
+    python benchmarks/import_time.py [--budget SECONDS] [--runs N] [--module api.main]
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "3.0"))
+
+def measure(module: str) -> tuple:
+    """Imports `module` in a new interpreter; returns (wall seconds, -X importtime report)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+def slowest_imports(report: str, top: int = 15) -> list:
+    """Parses the -X importtime report into the `top` (cumulative microseconds, module) entries."""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="api.main")
+    parser.add_argument("--budget", type=float, default=IMPORT_TIME_BUDGET, help="seconds")
+    parser.add_argument("--runs", type=int, default=3, help="the fastest run is kept")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    best, report = min(runs, key=lambda run: run[0])
+
+    print(f"import {args.module}: {best:.2f}s (best of {args.runs}, budget {args.budget:.2f}s)")
+    print("Slowest imports (cumulative):")
+    for microseconds, name in slowest_imports(report):
+        print(f"  {microseconds / 1e6:7.3f}s  {name}")
+
+    if best > args.budget:
+        print(f"FAIL: import time over budget by {best - args.budget:.2f}s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
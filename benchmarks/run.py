@@ -0,0 +1,209 @@
+# benchmarks/run.py
+"""
+Runs the benchmark scenarios offline, against deterministic fakes of Ollama and
+web search, and writes a JSON report (p50/p95 latency, throughput, peak memory).
+
+    python benchmarks/run.py [--scenarios single_agent,full_graph] [--iterations N] [--output FILE]
+
+Each scenario runs in a fresh interpreter with its own temporary data directories
+(cache, Chroma, history, checkpoints), so runs do not influence each other and
+never touch the data of a real deployment. Compare two reports with benchmarks/compare.py.
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+def fake_settings(args) -> dict:
+    return {
+        "llm_latency": args.llm_latency,
+        "llm_token_latency": args.llm_token_latency,
+        "llm_output_tokens": args.llm_output_tokens,
+        "embedding_latency": args.embedding_latency,
+        "search_latency": args.search_latency,
+        "search_result_chars": args.search_result_chars,
+        "llm_cache": args.llm_cache,
+        "semantic_cache": args.semantic_cache,
+    }
+
+def worker_environment(data_dir: str, fakes: dict) -> dict:
+    """Settings of the worker process: every store in `data_dir`, no network, no background work."""
+    env = dict(os.environ)
+    env.update({
+        "PYTHONHASHSEED": "0",
+        "AUTOGPT_CACHE_DIR": os.path.join(data_dir, "cache"),
+        "CHROMA_PATH": os.path.join(data_dir, "chromadb"),
+        "HISTORY_DIR": os.path.join(data_dir, "history"),
+        "HISTORY_DB_PATH": os.path.join(data_dir, "history", "history.sqlite3"),
+        "PERSISTENCE_QUEUE_PATH": os.path.join(data_dir, "history", "persistence_queue.sqlite3"),
+        "WORKFLOW_CHECKPOINT_PATH": os.path.join(data_dir, "checkpoints", "workflow.sqlite3"),
+        "EXPORT_CACHE_DIR": os.path.join(data_dir, "exports"),
+        "CHART_DIR": os.path.join(data_dir, "charts"),
+        "WEB_SEARCH_BACKEND": "fake",
+        "OLLAMA_WARM_ON_STARTUP": "0",
+        "OLLAMA_WARM_INTERVAL": "0",
+        "MEMORY_MAINTENANCE_INTERVAL": "0",
+        "TRACE_LOG": "0",
+        # Caches are off by default: every operation pays for its LLM calls
+        "LLM_CACHE_ENABLED": "1" if fakes["llm_cache"] else "0",
+        "SEMANTIC_CACHE_ENABLED": "1" if fakes["semantic_cache"] else "0",
+    })
+    return env
+
+def percentile(values: list, p: float):
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(p * len(values)) - 1))]
+
+def summarize(result: dict) -> dict:
+    latencies = sorted(result.pop("latencies"))
+    to_ms = lambda seconds: None if seconds is None else round(seconds * 1000, 2)
+    result.update({
+        "latency_ms": {
+            "p50": to_ms(percentile(latencies, 0.50)),
+            "p95": to_ms(percentile(latencies, 0.95)),
+            "mean": to_ms(sum(latencies) / len(latencies)) if latencies else None,
+            "min": to_ms(latencies[0]) if latencies else None,
+            "max": to_ms(latencies[-1]) if latencies else None,
+        },
+        "throughput_per_s": round(len(latencies) / result["wall_seconds"], 3) if result["wall_seconds"] else None,
+        "wall_seconds": round(result["wall_seconds"], 3),
+    })
+    return result
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_worker(name: str, options: dict, fakes: dict, result_path: str):
+    """Entry point of the worker process: wires the fakes into the app, then runs one scenario."""
+    os.chdir(ROOT)
+    from benchmarks.fakes import FakeChatModel, FakeEmbeddings, FakeSearchBackend
+    from benchmarks.scenarios import SCENARIOS
+    from agents.model_registry import DEFAULT_MODEL, model_registry
+    from memory.chromadb_client import use_embedding_model
+    from tools.web_search import register_search_backend
+    import planning.router  # registers the router node, if configured
+
+    register_search_backend("fake", lambda: FakeSearchBackend(fakes["search_latency"], fakes["search_result_chars"]))
+    for model in set(model_registry.configured_models()) | {DEFAULT_MODEL}:
+        model_registry.set_client(model, FakeChatModel(
+            model=model,
+            latency=fakes["llm_latency"],
+            token_latency=fakes["llm_token_latency"],
+            output_tokens=fakes["llm_output_tokens"],
+        ))
+    use_embedding_model(FakeEmbeddings(latency=fakes["embedding_latency"]))
+
+    scenario, _ = SCENARIOS[name]
+    result = summarize(scenario(options))
+    result["peak_rss_mb"] = peak_rss_mb()
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+def git_revision() -> dict:
+    def git(*command):
+        return subprocess.run(["git", *command], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+def run_scenario(name: str, options: dict, fakes: dict) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"autogpt-bench-{name}-") as data_dir:
+        result_path = os.path.join(data_dir, "result.json")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", name,
+                   "--worker-options", json.dumps({"options": options, "fakes": fakes}), "--worker-result", result_path]
+        process = subprocess.run(command, cwd=ROOT, env=worker_environment(data_dir, fakes),
+                                 capture_output=True, text=True)
+        if process.returncode != 0 or not os.path.exists(result_path):
+            return {"options": options, "failed": True, "stderr": process.stderr[-4000:]}
+        with open(result_path, encoding="utf-8") as f:
+            return {"options": options, **json.load(f)}
+
+def main() -> int:
+    from benchmarks.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated, default: all")
+    parser.add_argument("--iterations", type=int, help="measured operations per scenario")
+    parser.add_argument("--warmup", type=int, help="untimed operations before measuring")
+    parser.add_argument("--concurrency", type=int, help="threads of concurrent_load")
+    parser.add_argument("--duplicate-ratio", type=float, help="share of repeated objectives in concurrent_load")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per LLM call")
+    parser.add_argument("--llm-token-latency", type=float, default=0.0005, help="seconds per generated word")
+    parser.add_argument("--llm-output-tokens", type=int, default=200, help="words per LLM answer")
+    parser.add_argument("--embedding-latency", type=float, default=0.01, help="seconds per embedding call")
+    parser.add_argument("--search-latency", type=float, default=0.2, help="seconds per web search")
+    parser.add_argument("--search-result-chars", type=int, default=2000)
+    parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on")
+    parser.add_argument("--semantic-cache", action="store_true", help="keep the semantic result cache on")
+    parser.add_argument("--output", help=f"report file (default: {os.path.relpath(RESULTS_DIR, ROOT)}/<time>-<commit>.json)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-options", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        settings = json.loads(args.worker_options)
+        run_worker(args.worker, settings["options"], settings["fakes"], args.worker_result)
+        return 0
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+
+    fakes = fake_settings(args)
+    overrides = {"iterations": args.iterations, "warmup": args.warmup,
+                 "concurrency": args.concurrency, "duplicate_ratio": args.duplicate_ratio}
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "fakes": fakes,
+        "scenarios": {},
+    }
+    failed = False
+    for name in names:
+        _, defaults = SCENARIOS[name]
+        options = {**defaults, **{key: value for key, value in overrides.items() if key in defaults and value is not None}}
+        print(f"{name}: running {options} ...", flush=True)
+        result = report["scenarios"][name] = run_scenario(name, options, fakes)
+        if result.get("failed"):
+            failed = True
+            print(f"{name}: FAILED\n{result['stderr']}")
+            continue
+        latency = result["latency_ms"]
+        print(f"{name}: p50 {latency['p50']} ms, p95 {latency['p95']} ms, {result['throughput_per_s']}/s, "
+              f"peak RSS {result['peak_rss_mb']} MB, {result['error_count']} errors")
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (report["git"]["commit"] or "nogit")[:10] + ("-dirty" if report["git"]["dirty"] else "")
+        output = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {output}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# benchmarks/scenarios.py
+"""
+Benchmark scenarios. Each one prepares its workload, then times every operation;
+it runs inside a worker process already wired to the fakes (see benchmarks/run.py).
+
+A scenario is a function (options: dict) -> dict returning the per-operation
+latencies in seconds, the wall time of the measured phase and the errors.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Objectives with code keywords, so the router keeps every node of the full graph
+TOPICS = ("solar storage", "battery recycling", "grid demand", "wind forecasting", "heat pumps", "ev charging")
+
+def objectives(prefix: str, count: int, offset: int = 0) -> list:
+    """Distinct, deterministic objectives: no cache or single-flight can merge them."""
+    return [f"{prefix} #{offset + i}: {TOPICS[(offset + i) % len(TOPICS)]}" for i in range(count)]
+
+def measure(operation, inputs: list, warmup_inputs: list = (), concurrency: int = 1) -> dict:
+    """Runs `operation` on the warm-up inputs (untimed), then on `inputs` with `concurrency` threads."""
+    for item in warmup_inputs:
+        operation(item)
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            operation(item)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        results = [timed(item) for item in inputs]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, inputs))
+    wall = time.perf_counter() - start
+    return {
+        "latencies": [seconds for seconds, error in results if error is None],
+        "wall_seconds": wall,
+        "operations": len(inputs),
+        "errors": [error for _, error in results if error is not None][:20],
+        "error_count": sum(1 for _, error in results if error is not None),
+    }
+
+def api_client():
+    """TestClient on the real app, once /readyz reports the warm-up as done."""
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    client = TestClient(app)
+    client.__enter__()  # runs the startup hooks; the worker process exits without shutdown
+    deadline = time.time() + 60
+    while client.get("/readyz").status_code != 200:
+        if time.time() > deadline:
+            raise RuntimeError(f"API not ready: {client.get('/readyz').json()}")
+        time.sleep(0.1)
+    return client
+
+def execute_agent(client, agent: str):
+    def operation(objective: str):
+        response = client.post("/execute_agent", json={"agent": agent, "objective": objective})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return operation
+
+def single_agent(options: dict) -> dict:
+    """One planner call through POST /execute_agent: API, job pool, LLM runtime and persistence."""
+    client = api_client()
+    operation = execute_agent(client, options.get("agent", "planner"))
+    return measure(operation, objectives("plan", options["iterations"], offset=options["warmup"]),
+                   objectives("plan", options["warmup"]))
+
+def analyst_visualizer(options: dict) -> dict:
+    """Research (fake search and memory), data extraction and chart rendering through the API."""
+    client = api_client()
+    operation = execute_agent(client, "analyst_visualizer")
+    return measure(operation, objectives("chart", options["iterations"], offset=options["warmup"]),
+                   objectives("chart", options["warmup"]))
+
+def full_graph(options: dict) -> dict:
+    """The planner → researcher → coder → writer graph, invoked directly without the API."""
+    from planning.graph_orchestrator import get_workflow
+
+    workflow = get_workflow()
+    operation = lambda objective: workflow.invoke({"objective": objective})
+    prefix = "write a python script about"
+    return measure(operation, objectives(prefix, options["iterations"], offset=options["warmup"]),
+                   objectives(prefix, options["warmup"]))
+
+def bulk_ingestion(options: dict) -> dict:
+    """add_text_to_memory over distinct documents: splitting, embedding (cached) and Chroma writes."""
+    from benchmarks.fakes import fake_completion
+    from memory.chromadb_client import add_text_to_memory
+
+    def document(i: int) -> str:
+        text = fake_completion(f"document {i}", options["document_chars"] // 6)
+        return text[:options["document_chars"]]
+
+    operation = lambda i: add_text_to_memory(document(i), {"source": "benchmark"})
+    return measure(operation, list(range(options["warmup"], options["warmup"] + options["iterations"])),
+                   list(range(options["warmup"])))
+
+def concurrent_load(options: dict) -> dict:
+    """
+    Many planner requests at once through the API. A share of them (duplicate_ratio,
+    at most 0.5) repeat an objective already sent, which exercises single-flight coalescing.
+    """
+    client = api_client()
+    operation = execute_agent(client, options.get("agent", "planner"))
+    count = options["iterations"]
+    duplicates = int(count * min(options["duplicate_ratio"], 0.5))
+    inputs = []
+    for i, objective in enumerate(objectives("load", count - duplicates, offset=options["warmup"])):
+        # Each duplicate is sent right after its original, while the original is still running
+        inputs += [objective] * (1 + (i < duplicates))
+    return measure(operation, inputs, objectives("load", options["warmup"]), concurrency=options["concurrency"])
+
+# name -> (scenario, default options)
+SCENARIOS = {
+    "single_agent": (single_agent, {"iterations": 30, "warmup": 3}),
+    "analyst_visualizer": (analyst_visualizer, {"iterations": 10, "warmup": 2}),
+    "full_graph": (full_graph, {"iterations": 10, "warmup": 1}),
+    "bulk_ingestion": (bulk_ingestion, {"iterations": 50, "warmup": 2, "document_chars": 20000}),
+    "concurrent_load": (concurrent_load, {"iterations": 64, "warmup": 2, "concurrency": 8, "duplicate_ratio": 0.0}),
+}
@@ -0,0 +1,238 @@
+# memory/cache_store.py
+import os
+import re
+import time
+import sqlite3
+import weakref
+import threading
+from collections import OrderedDict
+
+# Directory holding the local caches (LLM responses, embeddings, searches...)
+CACHE_DIR = os.getenv("AUTOGPT_CACHE_DIR", "./cache")
+
+def cache_path(filename: str) -> str:
+    """Returns the path of a cache file inside CACHE_DIR."""
+    return os.path.join(CACHE_DIR, filename)
+
+# Every cache of this process, for flush_caches()
+_caches = weakref.WeakSet()
+
+def evict_least_recent(directory: str, max_bytes: int, skip_suffix: str = ".tmp") -> int:
+    """
+    Deletes the files of `directory` with the oldest modification time until the
+    directory fits in `max_bytes`. Callers touch a file (os.utime) when they serve
+    it, so this evicts the least recently used files. Returns the number deleted.
+    """
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.is_file() and not entry.name.endswith(skip_suffix)]
+    except FileNotFoundError:
+        return 0
+    files = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries)
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        deleted += 1
+    return deleted
+
+class TieredCache:
+    """
+    A small key/value cache: an in-process LRU in front of a SQLite table.
+    Entries expire after `ttl_seconds` (None = never) and the disk table is
+    trimmed to `max_entries`, least recently used first, as soon as a write adds
+    an entry over the limit. The bound is approximate: the number of entries is
+    counted in this process, and only recounted every few writes and on flush(),
+    so another process writing the same file can push the table past it for a
+    while. Values are str or bytes.
+    Hits never write to disk: access times are buffered in memory and written in
+    one transaction when the table is trimmed, when the buffer is full, or after
+    `flush_seconds`. flush_caches() writes and trims every cache, at shutdown.
+    """
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 10000,
+                 memory_entries: int = 256, ttl_seconds: float = None,
+                 flush_entries: int = 1000, flush_seconds: float = 60.0):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", namespace):
+            raise ValueError(f"Invalid cache namespace: {namespace!r}")
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        # key -> last access time, not yet written to disk
+        self._accessed = {}
+        self.flush_entries = flush_entries
+        self.flush_seconds = flush_seconds
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+        self._count = 0
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches.add(self)
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so that importing a module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.namespace} "
+                "(key TEXT PRIMARY KEY, value BLOB, created_at REAL, accessed_at REAL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.namespace}_accessed ON {self.namespace} (accessed_at)"
+            )
+            self._conn.commit()
+            self._count = self._conn.execute(f"SELECT COUNT(*) FROM {self.namespace}").fetchone()[0]
+        return self._conn
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Returns the cached value, or None on a miss or an expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self._touch(key, now)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            db = self._db()
+            row = db.execute(
+                f"SELECT value, created_at FROM {self.namespace} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                if row is not None:
+                    db.execute(f"DELETE FROM {self.namespace} WHERE key = ?", (key,))
+                    db.commit()
+                    self._count -= 1
+                self.misses += 1
+                return None
+            self._touch(key, now)
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            return row[0]
+
+    def _touch(self, key: str, now: float):
+        """Buffers an access; the buffer is written once it is large or old enough. Called with the lock held."""
+        self._accessed[key] = now
+        if len(self._accessed) >= self.flush_entries or now - self._last_flush >= self.flush_seconds:
+            db = self._db()
+            self._flush_accesses(db, now)
+            db.commit()
+
+    def _flush_accesses(self, db: sqlite3.Connection, now: float):
+        if self._accessed:
+            db.executemany(f"UPDATE {self.namespace} SET accessed_at = ? WHERE key = ?",
+                           [(accessed_at, key) for key, accessed_at in self._accessed.items()])
+            self._accessed = {}
+        self._last_flush = now
+
+    def flush(self):
+        """Writes the buffered access times now, then purges expired entries and trims the table."""
+        with self._lock:
+            db = self._db()
+            self._evict(db, time.time())
+            db.commit()
+
+    def get_many(self, keys: list) -> dict:
+        """Returns {key: value} for the keys present in the cache."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: str, value):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            new = db.execute(f"SELECT 1 FROM {self.namespace} WHERE key = ?", (key,)).fetchone() is None
+            db.execute(
+                f"INSERT OR REPLACE INTO {self.namespace} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._remember(key, value, now)
+            self._count += new
+            self._writes += 1
+            # The TTL purge and the recount cost a table scan: only do them every few writes
+            if self._writes % 50 == 0:
+                self._evict(db, now)
+            elif self._count > self.max_entries:
+                self._evict(db, now, full=False)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection, now: float, full: bool = True):
+        """
+        Trims the table to max_entries. `full` also purges the expired entries and
+        recounts the table, which corrects the count for writes of other processes.
+        """
+        # Access times first, so that trimming sees which entries were used recently
+        self._flush_accesses(db, now)
+        if full:
+            if self.ttl_seconds is not None:
+                cursor = db.execute(
+                    f"DELETE FROM {self.namespace} WHERE created_at < ?", (now - self.ttl_seconds,)
+                )
+                self.evictions += max(cursor.rowcount, 0)
+            self._count = db.execute(f"SELECT COUNT(*) FROM {self.namespace}").fetchone()[0]
+        if self._count > self.max_entries:
+            cursor = db.execute(
+                f"DELETE FROM {self.namespace} WHERE key IN "
+                f"(SELECT key FROM {self.namespace} ORDER BY accessed_at ASC LIMIT ?)",
+                (self._count - self.max_entries,),
+            )
+            self.evictions += max(cursor.rowcount, 0)
+            self._count -= max(cursor.rowcount, 0)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._accessed = {}
+            db = self._db()
+            db.execute(f"DELETE FROM {self.namespace}")
+            db.commit()
+            self._count = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+        }
+
+def flush_caches():
+    """Writes the buffered access times of every open cache and trims it; call at shutdown."""
+    for cache in list(_caches):
+        if cache._conn is not None:
+            cache.flush()
@@ -1,33 +1,168 @@
 # memory/chromadb_client.py
-import chromadb
-from langchain_chroma import Chroma # <-- NEW
-from langchain_ollama import OllamaEmbeddings # <-- NEW
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import os
+import math
+import time
+import threading
 from langchain_core.documents import Document
+from memory.cache_store import TieredCache, cache_path
+from memory.embeddings import CachedEmbeddings, content_hash
+from tools.tracing import span
 
-# Initialize a persistent ChromaDB client
-client = chromadb.PersistentClient(path="./chromadb_data")
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chromadb_data")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "llama3")
+# Number of chunks sent to Ollama in a single embedding request
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "100000"))
 
-# Use local embeddings from Ollama (this line is now correct)
-embeddings = OllamaEmbeddings(model="llama3")
+# ChromaDB, the embeddings and the vector store are created on first use, not at
+# import time: importing this module stays cheap and works without Chroma or Ollama.
+_lock = threading.RLock()
+_client = None
+_embeddings = None
+_vector_store = None
+_text_splitter = None
 
-# Create or get the vector store collection (this line is now correct)
-vector_store = Chroma(
-    client=client,
-    collection_name="autogpt_memory",
-    embedding_function=embeddings,
-)
+def get_client():
+    """Returns the persistent ChromaDB client."""
+    global _client
+    with _lock:
+        if _client is None:
+            import chromadb
+            _client = chromadb.PersistentClient(path=CHROMA_PATH)
+        return _client
+
+def get_embeddings() -> CachedEmbeddings:
+    """Local Ollama embeddings behind a persistent cache keyed by chunk content hash."""
+    global _embeddings
+    with _lock:
+        if _embeddings is None:
+            from langchain_ollama import OllamaEmbeddings
+            _embeddings = CachedEmbeddings(
+                OllamaEmbeddings(model=EMBEDDING_MODEL),
+                TieredCache(cache_path("embeddings.sqlite3"), "embeddings", max_entries=EMBED_CACHE_MAX_ENTRIES),
+                model_name=EMBEDDING_MODEL,
+                batch_size=EMBED_BATCH_SIZE,
+            )
+        return _embeddings
+
+def use_embedding_model(underlying):
+    """
+    Replaces the Ollama embedding model (offline benchmarks), keeping the cache
+    in front of it. Call it before the first use of the vector store.
+    """
+    global _embeddings, _vector_store
+    with _lock:
+        _embeddings = CachedEmbeddings(
+            underlying,
+            TieredCache(cache_path("embeddings.sqlite3"), "embeddings", max_entries=EMBED_CACHE_MAX_ENTRIES),
+            model_name=getattr(underlying, "model", type(underlying).__name__),
+            batch_size=EMBED_BATCH_SIZE,
+        )
+        _vector_store = None
+
+def get_vector_store():
+    """Creates or gets the vector store collection."""
+    global _vector_store
+    with _lock:
+        if _vector_store is None:
+            from langchain_chroma import Chroma
+            _vector_store = Chroma(
+                client=get_client(),
+                collection_name="autogpt_memory",
+                embedding_function=get_embeddings(),
+            )
+        return _vector_store
+
+def get_collection():
+    """The raw Chroma collection behind the vector store (for queries returning embeddings, maintenance)."""
+    return get_client().get_or_create_collection("autogpt_memory")
+
+def _maintainer():
+    # Imported here: memory.maintenance depends on this module
+    from memory.maintenance import memory_maintainer
+    return memory_maintainer
+
+def get_text_splitter():
+    global _text_splitter
+    with _lock:
+        if _text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            _text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        return _text_splitter
 
 def add_text_to_memory(text: str, metadata: dict = None):
-    """Splits text and adds it to the persistent vector store."""
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    docs = [Document(page_content=chunk, metadata=metadata or {}) for chunk in text_splitter.split_text(text)]
-    vector_store.add_documents(docs)
-    print(f"Added {len(docs)} document chunks to memory.")
+    """
+    Splits text and adds the chunks that are not stored yet to the vector store.
+    Chunks are content-addressed: their id is the hash of their text.
+    """
+    chunks = {}
+    for chunk in get_text_splitter().split_text(text):
+        chunks.setdefault(content_hash(chunk), chunk)
+    if not chunks:
+        return
+
+    vector_store = get_vector_store()
+    stored_ids = set(vector_store.get(ids=list(chunks), include=[])["ids"])
+    new_chunks = {chunk_id: chunk for chunk_id, chunk in chunks.items() if chunk_id not in stored_ids}
+    if not new_chunks:
+        print(f"All {len(chunks)} document chunks already in memory.")
+        return
+
+    metadata = {**(metadata or {}), "added_at": time.time()}
+    docs = [Document(page_content=chunk, metadata=metadata) for chunk in new_chunks.values()]
+    vector_store.add_documents(docs, ids=list(new_chunks))
+    try:
+        _maintainer().register(list(new_chunks), metadata)
+    except Exception as e:
+        print(f"Could not index the new chunks for maintenance: {e}")
+    print(f"Added {len(docs)} document chunks to memory ({len(stored_ids)} already stored).")
 
 def get_retriever(k_value: int = 5):
     """Returns a retriever for the vector store."""
-    return vector_store.as_retriever(search_kwargs={'k': k_value})
+    return get_vector_store().as_retriever(search_kwargs={'k': k_value})
+
+def cosine_similarity(a: list, b: list) -> float:
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+def _query(query: str, k_value: int, include: list) -> tuple:
+    """Embeds the query and asks the collection directly, so the result carries the ids Chroma returned."""
+    query_vector = get_embeddings().embed_query(query)
+    result = get_collection().query(query_embeddings=[query_vector], n_results=k_value, include=include)
+    if not result["ids"] or not result["ids"][0]:
+        return query_vector, [], {}
+    return query_vector, result["ids"][0], {key: result[key][0] for key in include}
+
+def search_memory_with_similarity(query: str, k_value: int = 5) -> list:
+    """
+    Returns the k closest chunks as (Document, cosine similarity) pairs, best first.
+    The similarity is computed from the stored embeddings, so it is comparable
+    across queries whatever the distance metric of the collection.
+    """
+    start = time.perf_counter()
+    with span("retrieval", "memory_similarity", k=k_value):
+        query_vector, ids, result = _query(query, k_value, ["documents", "metadatas", "embeddings"])
+    if not ids:
+        return []
+    matches = [
+        (Document(page_content=text, metadata=metadata or {}), cosine_similarity(query_vector, list(vector)))
+        for text, metadata, vector in zip(result["documents"], result["metadatas"], result["embeddings"])
+    ]
+    # Accesses are counted by Chroma id: chunks stored before content addressing keep their UUIDs
+    _maintainer().record_query(ids, time.perf_counter() - start)
+    return sorted(matches, key=lambda match: match[1], reverse=True)
+
+def retrieve(query: str, k_value: int = 5) -> list:
+    """Nearest chunks of the query; also feeds the maintenance statistics (latency, chunk access counts)."""
+    start = time.perf_counter()
+    with span("retrieval", "memory", k=k_value):
+        _, ids, result = _query(query, k_value, ["documents", "metadatas"])
+    docs = [
+        Document(page_content=text, metadata=metadata or {})
+        for text, metadata in zip(result.get("documents", []), result.get("metadatas", []))
+    ]
+    _maintainer().record_query(ids, time.perf_counter() - start)
+    return docs
 
 # Example of how to add initial data
-# add_text_to_memory("Initial data point: The project started on a Tuesday.", {"source": "initial_setup"})
\ No newline at end of file
+# add_text_to_memory("Initial data point: The project started on a Tuesday.", {"source": "initial_setup"})
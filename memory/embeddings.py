@@ -0,0 +1,59 @@
+# memory/embeddings.py
+import hashlib
+from array import array
+from langchain_core.embeddings import Embeddings
+
+def content_hash(text: str) -> str:
+    """Content address of a text chunk, used as cache key and as Chroma document id."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _pack(vector: list) -> bytes:
+    return array("f", vector).tobytes()
+
+def _unpack(blob: bytes) -> list:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embedding model with a persistent cache keyed by content hash.
+    Only texts never seen before reach the model, in batches of `batch_size`.
+    """
+
+    def __init__(self, underlying: Embeddings, cache, model_name: str, batch_size: int = 32):
+        self.underlying = underlying
+        self.cache = cache
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}:{content_hash(text)}"
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [self._key(text) for text in texts]
+        vectors = {key: _unpack(blob) for key, blob in self.cache.get_many(list(set(keys))).items()}
+
+        # Each distinct missing text is embedded once, even if repeated in `texts`
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            embedded = self.underlying.embed_documents([text for _, text in batch])
+            for (key, _), vector in zip(batch, embedded):
+                self.cache.set(key, _pack(vector))
+                vectors[key] = vector
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list:
+        key = self._key(text)
+        blob = self.cache.get(key)
+        if blob is not None:
+            return _unpack(blob)
+        vector = self.underlying.embed_query(text)
+        self.cache.set(key, _pack(vector))
+        return vector
@@ -0,0 +1,274 @@
+# memory/maintenance.py
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import Counter, deque
+from memory.chromadb_client import CHROMA_PATH, get_collection, cosine_similarity
+
+MEMORY_MAINTENANCE_PATH = os.getenv("MEMORY_MAINTENANCE_PATH", os.path.join(CHROMA_PATH, "maintenance.sqlite3"))
+# Seconds between two maintenance passes (0 = no background maintenance)
+MEMORY_MAINTENANCE_INTERVAL = float(os.getenv("MEMORY_MAINTENANCE_INTERVAL", "300"))
+# Chunks examined per pass and per task, so that a pass never holds the collection for long
+MEMORY_MAINTENANCE_BATCH = int(os.getenv("MEMORY_MAINTENANCE_BATCH", "100"))
+# Cosine similarity above which two chunks of the same source are merged
+MEMORY_DUPLICATE_THRESHOLD = float(os.getenv("MEMORY_DUPLICATE_THRESHOLD", "0.97"))
+MEMORY_DUPLICATE_NEIGHBORS = int(os.getenv("MEMORY_DUPLICATE_NEIGHBORS", "5"))
+
+# Retention per source: chunks older than max_age_days and read fewer than
+# min_access_count times are deleted, then the least used beyond max_chunks.
+# Sources without a policy are kept forever. Overridden with MEMORY_RETENTION_POLICIES (JSON).
+DEFAULT_RETENTION_POLICIES = {
+    "self_generated_report": {"max_age_days": 90, "min_access_count": 1, "max_chunks": 20000},
+}
+RETENTION_POLICIES = json.loads(os.getenv("MEMORY_RETENTION_POLICIES", "null")) or DEFAULT_RETENTION_POLICIES
+
+class MemoryMaintainer:
+    """
+    Keeps the `autogpt_memory` collection small and useful.
+
+    A side index (SQLite) records, for each chunk, its source, when it was added
+    and how often retrieval returned it. The first pass indexes the chunks added
+    before the index existed. Each pass then works on bounded batches: it merges
+    near-duplicates (same source, cosine similarity above the threshold; the most
+    used chunk is kept and inherits the access counts), then applies the retention
+    policies.
+    Retrievals only append to an in-memory buffer, flushed by the next pass.
+    """
+
+    def __init__(self, path: str = MEMORY_MAINTENANCE_PATH, batch_size: int = MEMORY_MAINTENANCE_BATCH,
+                 duplicate_threshold: float = MEMORY_DUPLICATE_THRESHOLD, policies: dict = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.duplicate_threshold = duplicate_threshold
+        self.policies = RETENTION_POLICIES if policies is None else policies
+        self._conn = None
+        self._lock = threading.Lock()
+        self._pass_lock = threading.Lock()
+        self._accesses = Counter()
+        self._latencies = deque(maxlen=500)
+        self._stopping = threading.Event()
+        self._thread = None
+        self.merged = 0
+        self.expired = 0
+        self.last_pass = {}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "id TEXT PRIMARY KEY, source TEXT NOT NULL, added_at REAL NOT NULL, "
+                "access_count INTEGER NOT NULL DEFAULT 0, last_accessed_at REAL, checked INTEGER NOT NULL DEFAULT 0);"
+                "CREATE INDEX IF NOT EXISTS chunks_unchecked ON chunks (checked, added_at);"
+                "CREATE INDEX IF NOT EXISTS chunks_retention ON chunks (source, added_at, access_count);"
+                "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);"
+            )
+        return self._conn
+
+    # --- Hooks called by memory.chromadb_client ---
+
+    def register(self, ids: list, metadata: dict = None):
+        """Indexes newly added chunks (see add_text_to_memory)."""
+        source = (metadata or {}).get("source", "")
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.executemany("INSERT OR IGNORE INTO chunks (id, source, added_at) VALUES (?, ?, ?)",
+                           [(chunk_id, source, now) for chunk_id in ids])
+            db.commit()
+
+    def record_query(self, ids: list, seconds: float):
+        """Notes a retrieval: its latency and the Chroma ids of the chunks it returned. Never touches the database."""
+        with self._lock:
+            self._latencies.append(seconds)
+            self._accesses.update(ids)
+
+    # --- Maintenance pass ---
+
+    def run_pass(self) -> dict:
+        """One incremental pass; returns what it did. Passes never overlap."""
+        with self._pass_lock:
+            start = time.perf_counter()
+            # The backfill pages through the collection by offset: it completes before anything is deleted
+            result = {"backfilled": self._backfill()}
+            result["accesses_flushed"] = self._flush_accesses()
+            result["merged"] = self._merge_duplicates()
+            result["expired"] = self._apply_retention()
+            result["seconds"] = round(time.perf_counter() - start, 3)
+            result["finished_at"] = time.time()
+            self.last_pass = result
+            return result
+
+    def _flush_accesses(self) -> int:
+        with self._lock:
+            accesses, self._accesses = self._accesses, Counter()
+            if not accesses:
+                return 0
+            now = time.time()
+            db = self._db()
+            db.executemany("UPDATE chunks SET access_count = access_count + ?, last_accessed_at = ? WHERE id = ?",
+                           [(count, now, chunk_id) for chunk_id, count in accesses.items()])
+            db.commit()
+        return sum(accesses.values())
+
+    def _backfill(self, page_size: int = 1000) -> int:
+        """Indexes the chunks stored before the maintenance index existed (metadata only, by pages)."""
+        with self._lock:
+            row = self._db().execute("SELECT value FROM state WHERE key = 'backfill_offset'").fetchone()
+        if row and row[0] == "done":
+            return 0
+        offset = int(row[0]) if row else 0
+        backfilled = 0
+        while True:
+            page = get_collection().get(include=["metadatas"], limit=page_size, offset=offset)
+            now = time.time()
+            rows = [
+                (chunk_id, (metadata or {}).get("source", ""), (metadata or {}).get("added_at", now))
+                for chunk_id, metadata in zip(page["ids"], page["metadatas"])
+            ]
+            offset += len(rows)
+            backfilled += len(rows)
+            with self._lock:
+                db = self._db()
+                db.executemany("INSERT OR IGNORE INTO chunks (id, source, added_at) VALUES (?, ?, ?)", rows)
+                # The offset is saved after each page, so an interrupted backfill resumes where it stopped
+                db.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('backfill_offset', ?)",
+                           ("done" if len(rows) < page_size else str(offset),))
+                db.commit()
+            if len(rows) < page_size:
+                return backfilled
+
+    def _merge_duplicates(self) -> int:
+        with self._lock:
+            batch = self._db().execute(
+                "SELECT id, source FROM chunks WHERE checked = 0 ORDER BY added_at LIMIT ?", (self.batch_size,)
+            ).fetchall()
+        if not batch:
+            return 0
+        collection = get_collection()
+        stored = collection.get(ids=[chunk_id for chunk_id, _ in batch], include=["embeddings"])
+        vectors = dict(zip(stored["ids"], stored["embeddings"]))
+        removed, merged = set(), 0
+        for chunk_id, source in batch:
+            if chunk_id in removed or chunk_id not in vectors:
+                continue
+            result = collection.query(
+                query_embeddings=[list(vectors[chunk_id])],
+                n_results=MEMORY_DUPLICATE_NEIGHBORS + 1,
+                where={"source": source} if source else None,
+                include=["embeddings"],
+            )
+            duplicates = [
+                neighbor_id for neighbor_id, vector in zip(result["ids"][0], result["embeddings"][0])
+                if neighbor_id != chunk_id and neighbor_id not in removed
+                and cosine_similarity(vectors[chunk_id], list(vector)) >= self.duplicate_threshold
+            ]
+            if duplicates:
+                losers = self._merge([chunk_id] + duplicates)
+                removed.update(losers)
+                merged += len(losers)
+        with self._lock:
+            db = self._db()
+            db.executemany("UPDATE chunks SET checked = 1 WHERE id = ?", [(chunk_id,) for chunk_id, _ in batch])
+            db.commit()
+        self.merged += merged
+        return merged
+
+    def _merge(self, group: list) -> list:
+        """Keeps the most used (then oldest) chunk of the group; it inherits the access counts of the others."""
+        with self._lock:
+            db = self._db()
+            rows = db.execute(
+                f"SELECT id, access_count, added_at FROM chunks WHERE id IN ({', '.join('?' for _ in group)})", group
+            ).fetchall()
+            known = {chunk_id: (count, added_at) for chunk_id, count, added_at in rows}
+            ranked = sorted(group, key=lambda chunk_id: (-known.get(chunk_id, (0, 0))[0], known.get(chunk_id, (0, 0))[1]))
+            survivor, losers = ranked[0], ranked[1:]
+            inherited = sum(known.get(chunk_id, (0, 0))[0] for chunk_id in losers)
+            db.execute("UPDATE chunks SET access_count = access_count + ? WHERE id = ?", (inherited, survivor))
+            db.commit()
+        self._delete(losers)
+        return losers
+
+    def _apply_retention(self) -> int:
+        now = time.time()
+        expired = []
+        with self._lock:
+            db = self._db()
+            for source, policy in self.policies.items():
+                max_age_days = policy.get("max_age_days")
+                if max_age_days:
+                    expired += [row[0] for row in db.execute(
+                        "SELECT id FROM chunks WHERE source = ? AND added_at < ? AND access_count < ? LIMIT ?",
+                        (source, now - max_age_days * 86400, policy.get("min_access_count", 1), self.batch_size),
+                    )]
+                max_chunks = policy.get("max_chunks")
+                if max_chunks:
+                    excess = db.execute("SELECT COUNT(*) FROM chunks WHERE source = ?", (source,)).fetchone()[0] - max_chunks
+                    if excess > 0:
+                        expired += [row[0] for row in db.execute(
+                            "SELECT id FROM chunks WHERE source = ? ORDER BY access_count, added_at LIMIT ?",
+                            (source, min(excess, self.batch_size)),
+                        )]
+        expired = list(dict.fromkeys(expired))
+        self._delete(expired)
+        self.expired += len(expired)
+        return len(expired)
+
+    def _delete(self, ids: list):
+        if not ids:
+            return
+        get_collection().delete(ids=ids)
+        with self._lock:
+            db = self._db()
+            db.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            db.commit()
+
+    # --- Background thread and statistics ---
+
+    def start(self, interval: float = MEMORY_MAINTENANCE_INTERVAL):
+        if interval <= 0 or self._thread is not None:
+            return
+        self._stopping.clear()
+
+        def loop():
+            while not self._stopping.wait(interval):
+                try:
+                    self.run_pass()
+                except Exception as e:
+                    print(f"Memory maintenance pass failed: {e}")
+
+        self._thread = threading.Thread(target=loop, name="memory-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            db = self._db()
+            by_source = dict(db.execute("SELECT source, COUNT(*) FROM chunks GROUP BY source").fetchall())
+            unchecked = db.execute("SELECT COUNT(*) FROM chunks WHERE checked = 0").fetchone()[0]
+
+        def percentile(p: float):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+
+        return {
+            "chunks": get_collection().count(),
+            "chunks_by_source": by_source,
+            "pending_duplicate_checks": unchecked,
+            "merged": self.merged,
+            "expired": self.expired,
+            "query_latency_ms": {"count": len(latencies), "p50": percentile(0.5), "p95": percentile(0.95)},
+            "last_pass": self.last_pass,
+            "policies": self.policies,
+        }
+
+memory_maintainer = MemoryMaintainer()
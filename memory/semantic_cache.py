@@ -0,0 +1,82 @@
+# memory/semantic_cache.py
+import os
+import time
+import threading
+from memory.chromadb_client import get_client, get_embeddings
+from memory.embeddings import content_hash
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+# Minimum cosine similarity between two objectives for a prior result to be reused
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+# Prior results older than this (in seconds) are never reused
+SEMANTIC_CACHE_MAX_AGE = float(os.getenv("SEMANTIC_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+_lock = threading.Lock()
+_semantic_store = None
+
+def get_semantic_store():
+    """
+    One entry per (agent, context, objective): the objective is embedded, the
+    result kept in metadata. Created on first use.
+    """
+    global _semantic_store
+    with _lock:
+        if _semantic_store is None:
+            from langchain_chroma import Chroma
+            _semantic_store = Chroma(
+                client=get_client(),
+                collection_name="autogpt_semantic_cache",
+                embedding_function=get_embeddings(),
+                collection_metadata={"hnsw:space": "cosine"},
+            )
+        return _semantic_store
+
+def _filter(agent: str, context: str = None) -> dict:
+    return {"$and": [
+        {"agent": {"$eq": agent}},
+        {"context_hash": {"$eq": content_hash(context or "")}},
+    ]}
+
+def lookup_result(agent: str, objective: str, context: str = None):
+    """
+    Returns the result of a prior run of `agent` whose objective is similar enough
+    to `objective` (same context), as a dict with output, objective, similarity
+    and age. Returns None when nothing fresh is above SEMANTIC_CACHE_THRESHOLD.
+    """
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    now = time.time()
+    matches = get_semantic_store().similarity_search_with_score(objective, k=3, filter=_filter(agent, context))
+    for doc, distance in matches:
+        similarity = 1.0 - distance
+        if similarity < SEMANTIC_CACHE_THRESHOLD:
+            break
+        age = now - doc.metadata.get("created_at", 0)
+        if age > SEMANTIC_CACHE_MAX_AGE:
+            continue
+        return {
+            "output": doc.metadata["output"],
+            "objective": doc.page_content,
+            "similarity": round(similarity, 4),
+            "age_seconds": round(age, 1),
+        }
+    return None
+
+def store_result(agent: str, objective: str, output: str, context: str = None):
+    """Records the result of a run so that similar objectives can reuse it."""
+    if not SEMANTIC_CACHE_ENABLED:
+        return
+    context_hash = content_hash(context or "")
+    get_semantic_store().add_texts(
+        [objective],
+        metadatas=[{"agent": agent, "context_hash": context_hash, "output": output, "created_at": time.time()}],
+        ids=[content_hash(f"{agent}\n{context_hash}\n{objective}")],
+    )
+
+def invalidate(agent: str = None):
+    """Drops the cached results of one agent, or all of them."""
+    where = {"agent": {"$eq": agent}} if agent else None
+    semantic_store = get_semantic_store()
+    ids = semantic_store.get(where=where, include=[])["ids"]
+    if ids:
+        semantic_store.delete(ids=ids)
@@ -1,7 +1,37 @@
 #planning/react_loop.py (Now planning/graph_orchestrator.py)
+import os
+import re
+import time
+import uuid
+import operator
+import sqlite3
+from functools import lru_cache
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, List
+from langgraph.types import Send
+from langgraph.checkpoint.sqlite import SqliteSaver
+from typing import TypedDict, List, Annotated
 from agents.agent_nodes import planner_node, researcher_node, coder_node, writer_node
+from agents.llm_runtime import run_node
+from planning.router import route, record_node_duration
+from memory import semantic_cache
+
+# SQLite file holding the state of every workflow run after each completed node
+WORKFLOW_CHECKPOINT_PATH = os.getenv("WORKFLOW_CHECKPOINT_PATH", "./checkpoints/workflow.sqlite3")
+# Plan steps researched as parallel branches; extra steps are folded into the last one
+WORKFLOW_MAX_STEPS = int(os.getenv("WORKFLOW_MAX_STEPS", "6"))
+# Maximum number of branches running at the same time
+WORKFLOW_MAX_PARALLEL_STEPS = int(os.getenv("WORKFLOW_MAX_PARALLEL_STEPS", "3"))
+
+def merge_step_results(current: list, update: list) -> list:
+    """
+    Reducer of the per-step research results: keeps one result per step index,
+    the latest one winning. An empty update resets the list (new plan).
+    """
+    if not update:
+        return []
+    merged = {result["index"]: result for result in current or []}
+    merged.update({result["index"]: result for result in update})
+    return sorted(merged.values(), key=lambda result: result["index"])
 
 class AgentState(TypedDict):
     """
@@ -9,52 +39,229 @@ class AgentState(TypedDict):
     """
     objective: str
     plan: str
+    steps: List[str]
+    step_results: Annotated[List[dict], merge_step_results]
     research_summary: str
     code: str
     report: str
+    routing: dict
+    skipped_nodes: Annotated[List[str], operator.add]
+
+def parse_plan_steps(plan: str, max_steps: int = WORKFLOW_MAX_STEPS) -> List[str]:
+    """
+    Splits the planner's numbered list into steps. Lines that are not numbered
+    (sub-bullets, details, or text starting with a figure such as "2.5 million")
+    stay attached to the step above them.
+    """
+    steps = []
+    for line in plan.splitlines():
+        match = re.match(r"^\s*(?:\*\*)?\d+[.)](?:\*\*)?\s+(.+)", line)
+        if match:
+            steps.append(match.group(1).strip())
+        elif line.strip() and steps:
+            steps[-1] += "\n" + line.strip()
+    if not steps:
+        return [plan.strip()] if plan.strip() else []
+    if len(steps) > max_steps:
+        steps = steps[:max_steps - 1] + ["\n".join(steps[max_steps - 1:])]
+    return steps
+
+def planning_node(state: AgentState) -> dict:
+    """Runs the planner and splits its plan into independent steps."""
+    result = planner_node(state)
+    steps = parse_plan_steps(result["plan"])
+    print(f"---PLAN SPLIT INTO {len(steps)} STEPS---")
+    return {**result, "steps": steps, "step_results": []}
+
+def router_node(state: AgentState) -> dict:
+    """Decides which of research and coding this objective actually needs."""
+    return route(state)
+
+def fan_out_steps(state: AgentState) -> list:
+    """Sends every plan step to its own research branch (the objective itself if the plan is empty)."""
+    steps = state.get("steps") or [state["objective"]]
+    return [
+        Send("step_researcher", {"objective": state["objective"], "index": i, "step": step})
+        for i, step in enumerate(steps)
+    ]
+
+def step_research_node(branch: dict) -> dict:
+    """Researches a single plan step (one parallel branch)."""
+    result = researcher_node({
+        "objective": branch["objective"],
+        "plan": f"Current step: {branch['step']}",
+        "query": branch["step"],
+    })
+    return {"step_results": [{"index": branch["index"], "step": branch["step"], "research_summary": result["research_summary"]}]}
+
+def merge_research_node(state: AgentState) -> dict:
+    """Joins the research of every branch, in plan order, into the research summary."""
+    sections = [
+        f"### Step {result['index'] + 1}: {result['step']}\n{result['research_summary']}"
+        for result in state.get("step_results", [])
+    ]
+    return {"research_summary": "\n\n".join(sections)}
+
+# The nodes of the graph (our "agents"), by name
+NODES = {
+    "planner": planning_node,
+    "router": router_node,
+    "step_researcher": step_research_node,
+    "merge_research": merge_research_node,
+    "coder": coder_node,
+    "writer": writer_node,
+}
 
 def should_continue(state: AgentState) -> str:
     """
-    A simple router. In a more complex setup, an LLM could make this decision.
-    For this example, we follow a fixed path but this is where conditional logic would go. [19]
+    Returns the next stage the run still needs, following the decision of the
+    router node (see planning/router.py): research, code, or straight to write.
     """
-    # This is a simplified conditional edge. A real implementation could use an LLM
-    # to decide if coding is necessary, if debugging is needed, etc. [4, 21]
-    if not state.get('research_summary'):
+    routing = state.get('routing') or {}
+    if routing.get('research', True) and not state.get('research_summary'):
         return "research"
-    if not state.get('code'):
+    if routing.get('code', True) and not state.get('code'):
         return "code"
     return "write"
 
+def route_after_planning(state: AgentState):
+    """Fans out to the research branches, or skips straight to coding or writing."""
+    decision = should_continue(state)
+    if decision == "research":
+        return fan_out_steps(state)
+    return "coder" if decision == "code" else "writer"
 
-def get_workflow():
+def timed_node(name: str):
+    """Wraps a node so that it emits streaming events and records its duration for the router."""
+    node_func = NODES[name]
+
+    def node(state):
+        start = time.perf_counter()
+        result = run_node(name, node_func, state)
+        record_node_duration(name, time.perf_counter() - start)
+        return result
+    return node
+
+
+def get_workflow(checkpointer=None):
     """
     Constructs and returns the LangGraph workflow.
+    With a checkpointer, the state is saved after every node under the run's thread_id.
     """
     # Define the state graph
     workflow = StateGraph(AgentState)
 
-    # Add the nodes (our "agents")
-    workflow.add_node("planner", planner_node)
-    workflow.add_node("researcher", researcher_node)
-    workflow.add_node("coder", coder_node)
-    workflow.add_node("writer", writer_node)
+    # Add the nodes (our "agents"), reporting node_start / node_end events when streamed
+    for name in NODES:
+        workflow.add_node(name, timed_node(name))
 
-    # Define the edges (the flow of control)
+    # Define the edges (the flow of control). The router decides after planning
+    # whether research (one branch per plan step) and coding are needed.
     workflow.set_entry_point("planner")
-    workflow.add_edge("planner", "researcher")
-    workflow.add_edge("researcher", "coder")
+    workflow.add_edge("planner", "router")
+    workflow.add_conditional_edges("router", route_after_planning, ["step_researcher", "coder", "writer"])
+    workflow.add_edge("step_researcher", "merge_research")
+    workflow.add_conditional_edges("merge_research", should_continue, {"code": "coder", "write": "writer"})
     workflow.add_edge("coder", "writer")
     workflow.add_edge("writer", END)
-    
-    # The conditional router is more advanced and would replace the simple edges above
-    # Example of how a conditional router would be added:
-    # workflow.add_conditional_edges(
-    #     "planner",
-    #     should_continue,
-    #     {"research": "researcher", "code": "coder", "write": "writer"}
-    # )
 
     # Compile the graph into a runnable app
-    app = workflow.compile()
-    return app
\ No newline at end of file
+    app = workflow.compile(checkpointer=checkpointer)
+    return app
+
+@lru_cache(maxsize=None)
+def get_checkpointer() -> SqliteSaver:
+    """Returns the shared SQLite checkpointer of workflow runs."""
+    directory = os.path.dirname(WORKFLOW_CHECKPOINT_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return SqliteSaver(sqlite3.connect(WORKFLOW_CHECKPOINT_PATH, check_same_thread=False))
+
+@lru_cache(maxsize=None)
+def get_checkpointed_workflow():
+    """The workflow compiled once with the shared checkpointer."""
+    return get_workflow(checkpointer=get_checkpointer())
+
+def _run_config(run_id: str) -> dict:
+    return {"configurable": {"thread_id": run_id}, "max_concurrency": WORKFLOW_MAX_PARALLEL_STEPS}
+
+def run_workflow(objective: str, use_cache: bool = True, run_id: str = None) -> dict:
+    """
+    Runs the workflow for an objective and returns the final state, including its run_id.
+    Every completed node is checkpointed: if a node fails, resume_workflow(run_id)
+    continues from there instead of re-running the whole chain.
+    A prior report for a near-duplicate objective (semantic cache) is returned
+    as-is instead, unless use_cache is False.
+    """
+    if use_cache:
+        hit = semantic_cache.lookup_result("workflow", objective)
+        if hit is not None:
+            print(f"---REUSING REPORT OF '{hit['objective']}' (similarity {hit['similarity']})---")
+            return {"objective": objective, "report": hit["output"]}
+
+    run_id = run_id or uuid.uuid4().hex
+    print(f"---WORKFLOW RUN {run_id}---")
+    final_state = dict(get_checkpointed_workflow().invoke({"objective": objective}, _run_config(run_id)))
+    final_state["run_id"] = run_id
+    routing = final_state.get("routing") or {}
+    print(f"---WORKFLOW RUN {run_id} DONE: skipped {final_state.get('skipped_nodes') or 'nothing'}, "
+          f"~{routing.get('estimated_seconds_saved', 0)}s saved---")
+
+    if use_cache and final_state.get("report"):
+        semantic_cache.store_result("workflow", objective, final_state["report"])
+    return final_state
+
+def get_run_state(run_id: str) -> dict:
+    """Returns the last checkpointed state of a run and the nodes still to execute."""
+    snapshot = get_checkpointed_workflow().get_state(_run_config(run_id))
+    if not snapshot.values:
+        raise KeyError(f"Unknown workflow run: {run_id}")
+    return {"run_id": run_id, "values": dict(snapshot.values), "next": list(snapshot.next)}
+
+def resume_workflow(run_id: str) -> dict:
+    """
+    Continues a run from its last completed node (after a failure or a restart).
+    A run that already finished is returned unchanged.
+    """
+    app = get_checkpointed_workflow()
+    config = _run_config(run_id)
+    snapshot = app.get_state(config)
+    if not snapshot.values:
+        raise KeyError(f"Unknown workflow run: {run_id}")
+    if snapshot.next:
+        print(f"---RESUMING WORKFLOW RUN {run_id} AT {', '.join(snapshot.next).upper()}---")
+        final_state = dict(app.invoke(None, config))
+    else:
+        final_state = dict(snapshot.values)
+    final_state["run_id"] = run_id
+    return final_state
+
+def rerun_node(run_id: str, node: str, resume: bool = False) -> dict:
+    """
+    Re-runs a single node of a run with the state it originally received. Its
+    new output is recorded on a fork of the checkpoint taken before the node,
+    which becomes the latest checkpoint of the run: the nodes after it see the
+    state they originally saw (no stale research or code) and are pending again;
+    with resume=True they are executed right away.
+    """
+    if node not in NODES:
+        raise ValueError(f"Unknown workflow node: {node}")
+    if node == "step_researcher":
+        # Branches receive their own input, not the graph state: re-run the planner instead
+        raise ValueError("Research branches cannot be re-run on their own; re-run 'planner' or 'merge_research'.")
+    app = get_checkpointed_workflow()
+    config = _run_config(run_id)
+
+    # History is newest first: take the latest state that was about to enter `node`
+    before = next((s for s in app.get_state_history(config) if node in s.next), None)
+    if before is None:
+        raise KeyError(f"Node '{node}' never ran in workflow run {run_id}")
+
+    print(f"---RE-RUNNING {node.upper()} FOR WORKFLOW RUN {run_id}---")
+    update = NODES[node](dict(before.values))
+    # Forking from `before` drops the downstream fields (research_summary, code...) of the
+    # later checkpoints, which should_continue would otherwise take as finished work
+    app.update_state(before.config, update, as_node=node)
+    if resume:
+        return resume_workflow(run_id)
+    return get_run_state(run_id)
@@ -0,0 +1,114 @@
+# planning/router.py
+import os
+import re
+import threading
+from langchain_core.prompts import ChatPromptTemplate
+from agents.llm_runtime import run_prompt
+from agents.model_registry import model_registry
+from memory.chromadb_client import search_memory_with_similarity
+
+# Memory chunks at least this similar to the objective make web research unnecessary
+ROUTER_MEMORY_CONFIDENCE = float(os.getenv("ROUTER_MEMORY_CONFIDENCE", "0.85"))
+ROUTER_MEMORY_K = int(os.getenv("ROUTER_MEMORY_K", "5"))
+# Optional small model asked "is code needed?" when the rules are inconclusive (empty = coder kept)
+ROUTER_MODEL = os.getenv("ROUTER_MODEL", "")
+if ROUTER_MODEL:
+    model_registry.register_node("router", ROUTER_MODEL)
+
+# Words in an objective that clearly call for code
+CODE_KEYWORDS = re.compile(
+    r"\b(code|coding|python|script|function|class|implement\w*|program\w*|algorithm|api|"
+    r"debug\w*|bug|refactor\w*|sql|regex|unit tests?|cli|library|module|snippet)\b",
+    re.IGNORECASE,
+)
+# Objectives that clearly call for no code: an explicit request, or a prose-only deliverable
+NO_CODE_PATTERNS = re.compile(
+    r"\b(no|without( any)?) (code|coding|programming)\b|\bnon-technical\b|"
+    r"^\s*(write|draft|compose)( me)? an? (essay|poem|story|letter|email|speech|blog post|press release)\b|"
+    r"^\s*(summari[sz]e|translate|proofread)\b",
+    re.IGNORECASE,
+)
+
+# Moving average of how long each node takes, used to estimate the time saved by skipping it
+_node_seconds = {}
+_node_seconds_lock = threading.Lock()
+
+def record_node_duration(node: str, seconds: float, weight: float = 0.3):
+    with _node_seconds_lock:
+        previous = _node_seconds.get(node)
+        _node_seconds[node] = seconds if previous is None else (1 - weight) * previous + weight * seconds
+
+def estimated_node_seconds(node: str) -> float:
+    with _node_seconds_lock:
+        return _node_seconds.get(node, 0.0)
+
+def needs_code(objective: str) -> tuple:
+    """
+    Returns (decision, reason). Explicit rules first, then the small model for the
+    undecided cases. Without a classifier an undecided objective keeps the coder:
+    the coder is only skipped on positive evidence that no code is wanted.
+    """
+    match = NO_CODE_PATTERNS.search(objective)
+    if match:
+        return False, f"no-code rule '{match.group(0).strip()}'"
+    match = CODE_KEYWORDS.search(objective)
+    if match:
+        return True, f"keyword '{match.group(0)}'"
+    if not ROUTER_MODEL:
+        return True, "inconclusive, coder kept"
+
+    prompt = ChatPromptTemplate.from_template(
+        """Does the following objective require writing source code? Answer with a single word: yes or no.
+
+        Objective: {objective}
+        """
+    )
+    answer = run_prompt(prompt, {"objective": objective}, model_registry.for_node("router"))
+    return answer.strip().lower().startswith("yes"), f"classifier ({ROUTER_MODEL}) answered '{answer.strip()[:20]}'"
+
+def memory_research(objective: str):
+    """
+    Returns (summary, best similarity). The summary is built from memory when its
+    best chunk is similar enough to the objective, and None when research is still needed.
+    """
+    matches = search_memory_with_similarity(objective, ROUTER_MEMORY_K)
+    if not matches or matches[0][1] < ROUTER_MEMORY_CONFIDENCE:
+        return None, matches[0][1] if matches else 0.0
+    relevant = [doc.page_content for doc, similarity in matches if similarity >= ROUTER_MEMORY_CONFIDENCE]
+    return "From memory:\n\n" + "\n\n".join(relevant), matches[0][1]
+
+def route(state: dict) -> dict:
+    """
+    Cheap decision step run after planning: decides whether research and coding
+    are needed. Returns the state update with the routing decision, the nodes
+    skipped and the estimated time saved.
+    """
+    objective = state["objective"]
+    update = {}
+    skipped = []
+
+    try:
+        summary, confidence = memory_research(objective)
+    except Exception as e:
+        print(f"Router: memory lookup failed ({e}), research kept.")
+        summary, confidence = None, 0.0
+    research = summary is None
+    if not research:
+        update["research_summary"] = summary
+        skipped += ["step_researcher", "merge_research"]
+
+    code, code_reason = needs_code(objective)
+    if not code:
+        skipped.append("coder")
+
+    saved = sum(estimated_node_seconds(node) for node in skipped)
+    update["routing"] = {
+        "research": research,
+        "research_reason": f"memory confidence {confidence:.2f} (threshold {ROUTER_MEMORY_CONFIDENCE})",
+        "code": code,
+        "code_reason": code_reason,
+        "estimated_seconds_saved": round(saved, 1),
+    }
+    update["skipped_nodes"] = skipped
+    print(f"---ROUTING: research={research}, code={code}, skipped={skipped or 'none'}, ~{saved:.1f}s saved---")
+    return update
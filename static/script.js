@@ -1,4 +1,40 @@
-// static/script.js (Version 2 avec Onglets)
+// static/script.js (Version 3 avec Onglets et Streaming)
+const NODE_LABELS = {
+    planner: 'Planification',
+    researcher: 'Recherche',
+    coder: 'Génération du code',
+    writer: 'Rédaction du rapport',
+    data_extractor: 'Extraction des données',
+    visualizer: 'Visualisation',
+};
+
+// Lit un flux Server-Sent Events depuis une réponse fetch et appelle onEvent(event, data)
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let separator;
+        while ((separator = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, separator);
+            buffer = buffer.slice(separator + 2);
+
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
 document.addEventListener('DOMContentLoaded', () => {
     const forms = document.querySelectorAll('.agent-form');
     const resultsArea = document.getElementById('results-area');
@@ -7,7 +43,7 @@ document.addEventListener('DOMContentLoaded', () => {
     forms.forEach(form => {
         form.addEventListener('submit', async (event) => {
             event.preventDefault();
-            
+
             const agent = form.dataset.agent;
             const formData = new FormData(form);
             const data = Object.fromEntries(formData.entries());
@@ -17,34 +53,67 @@ document.addEventListener('DOMContentLoaded', () => {
             button.disabled = true;
             button.textContent = 'En cours...';
 
-            resultsArea.classList.add('d-none'); // Cache les anciens résultats
+            renderedOutput.innerHTML = '';
+            resultsArea.classList.remove('d-none');
+
+            // Texte reçu token par token, re-rendu au plus une fois par frame
+            let streamedText = '';
+            let reportId = null;
+            let renderScheduled = false;
+            const scheduleRender = () => {
+                if (renderScheduled) return;
+                renderScheduled = true;
+                requestAnimationFrame(() => {
+                    renderScheduled = false;
+                    renderedOutput.innerHTML = marked.parse(streamedText);
+                });
+            };
 
             try {
-                // Note : nous aurons besoin de créer cet endpoint `/execute_agent`
-                const response = await fetch('/execute_agent', {
+                const response = await fetch('/execute_agent/stream', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ agent, ...data })
                 });
 
-                const result = await response.json();
-
-                if (response.ok) {
-                    // Utilise marked.js pour afficher le Markdown en HTML
-                    renderedOutput.innerHTML = marked.parse(result.output || 'Aucun résultat textuel.');
-                    resultsArea.classList.remove('d-none');
-                } else {
+                if (!response.ok) {
+                    const result = await response.json();
                     renderedOutput.innerHTML = `<p class="text-danger">Erreur: ${result.detail || 'Erreur inconnue'}</p>`;
-                    resultsArea.classList.remove('d-none');
+                    return;
                 }
 
+                await readEventStream(response, (name, payload) => {
+                    if (name === 'node_start') {
+                        button.textContent = `${NODE_LABELS[payload.node] || payload.node}...`;
+                        // Chaque étape repart d'une zone vide : seule la sortie finale est conservée
+                        streamedText = '';
+                        scheduleRender();
+                    } else if (name === 'token') {
+                        streamedText += payload.text;
+                        scheduleRender();
+                    } else if (name === 'report') {
+                        reportId = payload.report_id;
+                    } else if (name === 'done') {
+                        // Utilise marked.js pour afficher le Markdown en HTML
+                        streamedText = payload.output || 'Aucun résultat textuel.';
+                        if (reportId) {
+                            // Le PDF n'est généré que si l'utilisateur le demande
+                            streamedText += `\n\n---\n[Télécharger en PDF](/reports/${encodeURIComponent(reportId)}/export?format=pdf)`;
+                        }
+                        scheduleRender();
+                    } else if (name === 'error') {
+                        // marked laisse passer le HTML : l'erreur remplace la sortie partielle
+                        streamedText = `<p class="text-danger">Erreur: ${payload.detail || 'Erreur inconnue'}</p>`;
+                        scheduleRender();
+                    }
+                });
+
             } catch (error) {
                 renderedOutput.innerHTML = `<p class="text-danger">Erreur de connexion: ${error.message}</p>`;
-                resultsArea.classList.remove('d-none');
             } finally {
                 button.disabled = false;
                 button.textContent = originalButtonText;
             }
         });
     });
-});
\ No newline at end of file
+});
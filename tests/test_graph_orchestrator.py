@@ -0,0 +1,53 @@
+# tests/test_graph_orchestrator.py
+import pytest
+
+pytest.importorskip("langgraph")
+from langgraph.checkpoint.memory import MemorySaver
+import planning.graph_orchestrator as orchestrator
+
+@pytest.fixture
+def workflow(monkeypatch):
+    """The real graph with stub nodes and an in-memory checkpointer; returns the calls per node."""
+    calls = {"planner": 0, "coder": 0, "writer": 0}
+
+    def planner(state):
+        calls["planner"] += 1
+        return {"plan": f"1. step (plan {calls['planner']})", "steps": ["step"], "step_results": []}
+
+    def coder(state):
+        calls["coder"] += 1
+        return {"code": f"code {calls['coder']}"}
+
+    def writer(state):
+        calls["writer"] += 1
+        return {"report": f"report with {state.get('code')}"}
+
+    monkeypatch.setitem(orchestrator.NODES, "planner", planner)
+    monkeypatch.setitem(orchestrator.NODES, "router", lambda state: {"routing": {"research": True, "code": True}})
+    monkeypatch.setitem(orchestrator.NODES, "step_researcher", lambda branch: {
+        "step_results": [{"index": branch["index"], "step": branch["step"], "research_summary": "found"}]
+    })
+    monkeypatch.setitem(orchestrator.NODES, "coder", coder)
+    monkeypatch.setitem(orchestrator.NODES, "writer", writer)
+    monkeypatch.setattr(orchestrator, "record_node_duration", lambda node, seconds: None)
+    app = orchestrator.get_workflow(checkpointer=MemorySaver())
+    monkeypatch.setattr(orchestrator, "get_checkpointed_workflow", lambda: app)
+    return calls
+
+def test_rerun_planner_on_finished_run_reruns_downstream_nodes(workflow):
+    first = orchestrator.run_workflow("objective", use_cache=False, run_id="run")
+    assert first["report"] == "report with code 1"
+    assert workflow == {"planner": 1, "coder": 1, "writer": 1}
+
+    final = orchestrator.rerun_node("run", "planner", resume=True)
+
+    assert workflow == {"planner": 2, "coder": 2, "writer": 2}
+    assert final["plan"] == "1. step (plan 2)"
+    assert final["report"] == "report with code 2"
+
+def test_parse_plan_steps_keeps_figures_inside_their_step():
+    plan = "1. Size the market\nAbout 2.5 million users\n2.5 million of them are in Europe\n2) Build the scraper"
+    assert orchestrator.parse_plan_steps(plan) == [
+        "Size the market\nAbout 2.5 million users\n2.5 million of them are in Europe",
+        "Build the scraper",
+    ]
@@ -0,0 +1,231 @@
+# tools/chart_renderer.py
+import os
+import re
+import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from memory.cache_store import evict_least_recent
+from tools.tracing import span, record_cache_lookup
+
+# Charts are served by the API at CHART_URL_PREFIX/<file> (see ChartRenderer.serve)
+CHART_DIR = os.getenv("CHART_DIR", "static/charts")
+CHART_URL_PREFIX = os.getenv("CHART_URL_PREFIX", "/static/charts")
+CHART_FORMAT = os.getenv("CHART_FORMAT", "png")
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "30"))
+# Total size of the charts and their specs; least recently viewed charts are deleted above it
+CHART_MAX_BYTES = int(os.getenv("CHART_MAX_BYTES", str(50 * 1024 * 1024)))
+
+FORMATS = ("png", "svg")
+CHART_FILENAME = re.compile(r"^chart_([0-9a-f]{32})\.(png|svg)$")
+
+STYLES = {
+    "default": {"colors": ["#00aaff", "#00ffaa", "#ffaa00", "#ff5555"], "figsize": (6.4, 4.8), "dpi": 100},
+    "wide": {"colors": ["#00aaff", "#00ffaa", "#ffaa00", "#ff5555"], "figsize": (10, 4.8), "dpi": 100},
+    "mono": {"colors": ["#444444"], "figsize": (6.4, 4.8), "dpi": 100},
+}
+
+def chart_key(labels: list, values: list, title: str, ylabel: str, style: str) -> str:
+    """Content address of a chart: identical data, title and style share one file per format."""
+    payload = json.dumps([list(labels), [float(v) for v in values], title, ylabel, style], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+def _render_chart(path: str, fmt: str, labels: list, values: list, title: str, ylabel: str, style: str):
+    """
+    Runs in a worker process. Uses the object-oriented Figure API, which holds no
+    global state (unlike pyplot), and writes atomically so a half-written file is never served.
+    """
+    from matplotlib.figure import Figure
+
+    options = STYLES[style]
+    fig = Figure(figsize=options["figsize"], dpi=options["dpi"])
+    ax = fig.subplots()
+    ax.bar(labels, values, color=options["colors"])
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    for label in ax.get_xticklabels():
+        label.set_rotation(15)
+        label.set_horizontalalignment("right")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # bbox_inches='tight' keeps the rotated labels inside the image
+    fig.savefig(tmp_path, format=fmt, bbox_inches="tight")
+    os.replace(tmp_path, path)
+
+def _files(directory: str) -> list:
+    try:
+        return [entry for entry in os.scandir(directory) if entry.is_file()]
+    except FileNotFoundError:
+        return []
+
+def _directory_bytes(directory: str) -> int:
+    return sum(entry.stat().st_size for entry in _files(directory))
+
+class ChartRenderer:
+    """
+    Renders bar charts in a process pool and caches them on disk by content hash.
+    Concurrent requests for the same chart wait for a single rendering. Files are
+    touched when rendered or served (serve()), and the least recently used ones are
+    deleted once the directory exceeds max_bytes. The data of every chart is kept
+    in a small spec file under specs/, so an evicted chart still linked from a
+    report is rendered again when it is requested. Specs count towards max_bytes
+    too: once the charts are gone and the specs alone exceed it, the least recently
+    used specs are deleted, and their charts can no longer be rendered again.
+    """
+
+    def __init__(self, directory: str = CHART_DIR, url_prefix: str = CHART_URL_PREFIX,
+                 workers: int = CHART_WORKERS, max_bytes: int = CHART_MAX_BYTES,
+                 timeout: float = CHART_RENDER_TIMEOUT):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._pool = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+        self.deleted = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn": forking a multi-threaded server process is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def render(self, labels: list, values: list, title: str, ylabel: str = "",
+               style: str = "default", fmt: str = CHART_FORMAT) -> str:
+        """Returns the URL of the chart, rendering it only if it is not on disk yet."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported chart format '{fmt}' (expected one of {', '.join(FORMATS)}).")
+        if style not in STYLES:
+            raise ValueError(f"Unknown chart style '{style}' (expected one of {', '.join(STYLES)}).")
+        if len(labels) != len(values):
+            raise ValueError("Chart labels and values must have the same length.")
+
+        key = chart_key(labels, values, title, ylabel, style)
+        filename = f"chart_{key}.{fmt}"
+        path = os.path.join(self.directory, filename)
+        url = f"{self.url_prefix}/{filename}"
+        self._save_spec(key, {"labels": list(labels), "values": [float(v) for v in values],
+                              "title": title, "ylabel": ylabel, "style": style})
+
+        with self._lock:
+            if os.path.exists(path):
+                self.hits += 1
+                record_cache_lookup("charts", True)
+                os.utime(path)
+                return url
+            future = self._inflight.get(path)
+            owner = future is None
+            if owner:
+                os.makedirs(self.directory, exist_ok=True)
+                future = self._executor().submit(_render_chart, path, fmt, list(labels), [float(v) for v in values], title, ylabel, style)
+                self._inflight[path] = future
+                self.renders += 1
+
+        record_cache_lookup("charts", False)
+        try:
+            with span("render", "chart", format=fmt, coalesced=not owner):
+                future.result(timeout=self.timeout)
+        except BrokenExecutor:
+            # A worker died (killed, out of memory): the next render starts a new pool
+            with self._lock:
+                if self._pool is not None and getattr(self._pool, "_broken", False):
+                    self._pool.shutdown(wait=False)
+                    self._pool = None
+            raise
+        finally:
+            if owner:
+                with self._lock:
+                    self._inflight.pop(path, None)
+        if owner:
+            self.collect_garbage()
+        return url
+
+    def _spec_path(self, key: str) -> str:
+        return os.path.join(self.directory, "specs", f"{key}.json")
+
+    def _save_spec(self, key: str, spec: dict):
+        path = self._spec_path(key)
+        try:
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(spec, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def serve(self, filename: str) -> str:
+        """
+        Path of a chart requested by its URL file name. The file is touched, so
+        that eviction follows actual views; a chart evicted since its report was
+        written is rendered again from its spec. KeyError if the chart is unknown;
+        TimeoutError or BrokenExecutor if rendering it again fails for lack of workers.
+        """
+        match = CHART_FILENAME.match(filename)
+        if not match:
+            raise KeyError(filename)
+        key, fmt = match.groups()
+        path = os.path.join(self.directory, filename)
+        try:
+            os.utime(path)
+            with self._lock:
+                self.hits += 1
+            record_cache_lookup("charts", True)
+            self._touch_spec(key)
+            return path
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self._spec_path(key), encoding="utf-8") as f:
+                spec = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(filename)
+        self.render(fmt=fmt, **spec)
+        return path
+
+    def _touch_spec(self, key: str):
+        try:
+            os.utime(self._spec_path(key))
+        except FileNotFoundError:
+            pass
+
+    def collect_garbage(self) -> int:
+        """
+        Deletes the least recently used charts until charts and specs fit in
+        max_bytes, then the least recently used specs if they still do not.
+        """
+        specs = os.path.join(self.directory, "specs")
+        deleted = evict_least_recent(self.directory, max(0, self.max_bytes - _directory_bytes(specs)))
+        deleted += evict_least_recent(specs, max(0, self.max_bytes - _directory_bytes(self.directory)))
+        with self._lock:
+            self.deleted += deleted
+        return deleted
+
+    def stats(self) -> dict:
+        specs = os.path.join(self.directory, "specs")
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "renders": self.renders,
+                "in_flight": len(self._inflight),
+                "deleted": self.deleted,
+                "files": len(_files(self.directory)),
+                "specs": len(_files(specs)),
+                "bytes": _directory_bytes(self.directory) + _directory_bytes(specs),
+                "max_bytes": self.max_bytes,
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+chart_renderer = ChartRenderer()
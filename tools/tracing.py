@@ -0,0 +1,90 @@
+# tools/tracing.py
+import os
+import json
+import time
+import uuid
+import contextvars
+from contextlib import contextmanager
+from prometheus_client import Counter, Histogram
+
+# Print every finished span as a JSON line (structured log)
+TRACE_LOG = os.getenv("TRACE_LOG", "0") == "1"
+
+SPAN_SECONDS = Histogram(
+    "autogpt_span_seconds",
+    "Duration of instrumented steps (node, llm, retrieval, search, persistence, render, request)",
+    ["kind", "name"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+SPAN_ERRORS = Counter("autogpt_span_errors_total", "Instrumented steps that raised", ["kind", "name"])
+LLM_TOKENS = Counter("autogpt_llm_tokens_total", "Estimated LLM tokens", ["model", "node", "type"])
+CACHE_LOOKUPS = Counter("autogpt_cache_lookups_total", "Cache lookups by result", ["cache", "result"])
+
+# Spans of the current request (shared with its worker threads) and the enclosing span
+_trace = contextvars.ContextVar("trace", default=None)
+_parent = contextvars.ContextVar("trace_parent", default=None)
+
+@contextmanager
+def collect_trace(spans: list = None):
+    """Collects, into the yielded list (`spans` or a new one), the spans finished within this context."""
+    spans = [] if spans is None else spans
+    token = _trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _trace.reset(token)
+
+@contextmanager
+def span(kind: str, name: str, **attributes):
+    """
+    Times a step and records it in the `autogpt_span_seconds` histogram and in
+    the current trace. The yielded dict can be filled with attributes while the
+    step runs (tokens, cache_hit...).
+    """
+    span_id = uuid.uuid4().hex[:16]
+    record = {"id": span_id, "parent": _parent.get(), "kind": kind, "name": name, **attributes}
+    token = _parent.set(span_id)
+    start = time.perf_counter()
+    record["start"] = time.time()
+    try:
+        yield record
+    except BaseException as e:
+        SPAN_ERRORS.labels(kind, name).inc()
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _parent.reset(token)
+        SPAN_SECONDS.labels(kind, name).observe(seconds)
+        record["duration_ms"] = round(seconds * 1000, 1)
+        spans = _trace.get()
+        if spans is not None:
+            spans.append(record)
+        if TRACE_LOG:
+            print(json.dumps(record, ensure_ascii=False, default=str))
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+def record_llm_tokens(model: str, node: str, prompt_tokens: int, completion_tokens: int):
+    LLM_TOKENS.labels(model or "", node or "", "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(model or "", node or "", "completion").inc(completion_tokens)
+
+def summarize(spans: list) -> dict:
+    """
+    Timing breakdown of a request: time per kind of step and per node, and the
+    spans in start order. Steps running in parallel are summed, so the totals
+    per kind may exceed the wall time.
+    """
+    by_kind, by_node = {}, {}
+    for record in spans:
+        by_kind[record["kind"]] = round(by_kind.get(record["kind"], 0.0) + record["duration_ms"], 1)
+        if record["kind"] == "node":
+            by_node[record["name"]] = round(by_node.get(record["name"], 0.0) + record["duration_ms"], 1)
+    total = max((record["duration_ms"] for record in spans if record["parent"] is None), default=0.0)
+    return {
+        "total_ms": total,
+        "by_kind_ms": by_kind,
+        "by_node_ms": by_node,
+        "spans": sorted(spans, key=lambda record: record["start"]),
+    }
@@ -1,6 +1,186 @@
 # tools/web_search.py
-from langchain_community.tools import DuckDuckGoSearchRun
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from functools import lru_cache
+from memory.cache_store import TieredCache, cache_path
+from tools.tracing import span, record_cache_lookup
 
-def get_web_search_tool():
-    """Initializes and returns the DuckDuckGo search tool."""
-    return DuckDuckGoSearchRun()
\ No newline at end of file
+WEB_SEARCH_BACKEND = os.getenv("WEB_SEARCH_BACKEND", "duckduckgo")
+WEB_SEARCH_CACHE_TTL = float(os.getenv("WEB_SEARCH_CACHE_TTL", "3600"))
+WEB_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES", "2000"))
+# SQLite corpus used by the "local" backend (air-gapped deployments, tests)
+WEB_SEARCH_CORPUS_PATH = os.getenv("WEB_SEARCH_CORPUS_PATH", cache_path("search_corpus.sqlite3"))
+# Optional JSON Lines file imported into that corpus when the backend is first used
+WEB_SEARCH_CORPUS_JSONL = os.getenv("WEB_SEARCH_CORPUS_JSONL", "")
+WEB_SEARCH_LOCAL_RESULTS = int(os.getenv("WEB_SEARCH_LOCAL_RESULTS", "5"))
+
+def normalize_query(query: str) -> str:
+    """Lowercases and collapses whitespace so trivially different queries share a cache entry."""
+    return " ".join(query.lower().split()).strip(" ?!.")
+
+class DuckDuckGoBackend:
+    """Live web search through DuckDuckGo."""
+    name = "duckduckgo"
+
+    def __init__(self):
+        from langchain_community.tools import DuckDuckGoSearchRun
+        self._tool = DuckDuckGoSearchRun()
+
+    def search(self, query: str) -> str:
+        return self._tool.run(query)
+
+class LocalCorpusBackend:
+    """
+    Full-text search (SQLite FTS5) over a local corpus of documents.
+    Documents are added with add_documents() or load_jsonl(); the file named by
+    WEB_SEARCH_CORPUS_JSONL is loaded when the backend is created.
+    """
+    name = "local"
+
+    def __init__(self, path: str = WEB_SEARCH_CORPUS_PATH, max_results: int = WEB_SEARCH_LOCAL_RESULTS,
+                 jsonl_path: str = WEB_SEARCH_CORPUS_JSONL):
+        self.path = path
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(title, content)")
+        # Rowids of the documents imported from each file, so a file is only re-imported when it changes
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS imported_files "
+            "(path TEXT PRIMARY KEY, signature TEXT NOT NULL, first_rowid INTEGER, last_rowid INTEGER)"
+        )
+        self._conn.commit()
+        if jsonl_path:
+            self.load_jsonl(jsonl_path)
+
+    def add_documents(self, documents: list):
+        """Adds documents given as {"title": ..., "content": ...} dicts."""
+        with self._lock:
+            self._insert(documents)
+            self._conn.commit()
+
+    def _insert(self, documents: list) -> tuple:
+        """Inserts without committing; returns the (first, last) rowids, or (None, None)."""
+        rowids = [self._conn.execute("INSERT INTO documents (title, content) VALUES (?, ?)",
+                                     (doc.get("title", ""), doc["content"])).lastrowid
+                  for doc in documents]
+        return (rowids[0], rowids[-1]) if rowids else (None, None)
+
+    def load_jsonl(self, path: str) -> int:
+        """
+        Imports a JSON Lines file with one {"title", "content"} object per line.
+        A file already imported and unchanged (same size and modification time) is
+        skipped; a changed file replaces the documents of its previous import.
+        Returns the number of documents imported.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+        with open(path, encoding="utf-8") as f:
+            documents = [json.loads(line) for line in f if line.strip()]
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT signature, first_rowid, last_rowid FROM imported_files WHERE path = ?", (path,)
+            ).fetchone()
+            if previous and previous[0] == signature:
+                return 0
+            if previous and previous[1] is not None:
+                self._conn.execute("DELETE FROM documents WHERE rowid BETWEEN ? AND ?", previous[1:])
+            first, last = self._insert(documents)
+            self._conn.execute("INSERT OR REPLACE INTO imported_files VALUES (?, ?, ?, ?)",
+                               (path, signature, first, last))
+            self._conn.commit()
+        print(f"Local search corpus: {len(documents)} documents imported from {path}")
+        return len(documents)
+
+    def search(self, query: str) -> str:
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return ""
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title, snippet(documents, 1, '', '', '...', 48) FROM documents "
+                "WHERE documents MATCH ? ORDER BY bm25(documents) LIMIT ?",
+                (match, self.max_results),
+            ).fetchall()
+        return "\n".join(f"{title}: {snippet}" if title else snippet for title, snippet in rows)
+
+_backends = {
+    "duckduckgo": DuckDuckGoBackend,
+    "local": LocalCorpusBackend,
+}
+
+def register_search_backend(name: str, factory):
+    """Makes a backend available to WEB_SEARCH_BACKEND. `factory()` returns an object with search(query)."""
+    _backends[name] = factory
+
+class CachedSearchTool:
+    """
+    Search tool with the `run(query)` interface of the LangChain tools, backed by
+    one of the search backends and a cache keyed on the normalized query.
+    """
+
+    def __init__(self, backend, cache: TieredCache):
+        self.backend = backend
+        self.cache = cache
+        self.backend_calls = 0
+        self.backend_errors = 0
+        self.backend_seconds = 0.0
+        self.last_backend_seconds = 0.0
+
+    def run(self, query: str) -> str:
+        with span("search", self.backend.name) as record:
+            key = f"{self.backend.name}:{normalize_query(query)}"
+            cached = self.cache.get(key)
+            record["cache_hit"] = cached is not None
+            record_cache_lookup("web_search", cached is not None)
+            if cached is not None:
+                return cached
+
+            start = time.perf_counter()
+            try:
+                result = self.backend.search(query)
+            except Exception:
+                self.backend_errors += 1
+                raise
+            finally:
+                self.last_backend_seconds = time.perf_counter() - start
+                self.backend_seconds += self.last_backend_seconds
+                self.backend_calls += 1
+            self.cache.set(key, result)
+            return result
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        stats.update({
+            "backend": self.backend.name,
+            "backend_calls": self.backend_calls,
+            "backend_errors": self.backend_errors,
+            "backend_seconds_total": round(self.backend_seconds, 3),
+            "backend_seconds_avg": round(self.backend_seconds / self.backend_calls, 3) if self.backend_calls else 0.0,
+            "backend_seconds_last": round(self.last_backend_seconds, 3),
+        })
+        return stats
+
+@lru_cache(maxsize=None)
+def get_web_search_tool(backend: str = WEB_SEARCH_BACKEND):
+    """Returns the shared, cached search tool for the given backend (WEB_SEARCH_BACKEND by default)."""
+    if backend not in _backends:
+        raise ValueError(f"Unknown web search backend: {backend!r}")
+    return CachedSearchTool(
+        _backends[backend](),
+        TieredCache(
+            cache_path("web_search.sqlite3"),
+            "web_search",
+            max_entries=WEB_SEARCH_CACHE_MAX_ENTRIES,
+            ttl_seconds=WEB_SEARCH_CACHE_TTL,
+        ),
+    )